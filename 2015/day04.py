@@ -3,41 +3,96 @@
 https://adventofcode.com/2015/day/4
 """
 
+from concurrent.futures import ProcessPoolExecutor
 from hashlib import md5
-from itertools import count
-from typing import Iterator
+from itertools import repeat
+from os import cpu_count
+from time import perf_counter
+from typing import Iterator, Optional, Tuple
 import aocd  # type: ignore
+from adventofcode.hashing import CHUNK_SIZE, prefix_search, search_chunk
 
 
-def adventcoin(secret_key: str, leading_zeroes: int = 5) -> Iterator[int]:
+def adventcoin(
+    secret_key: str, leading_zeroes: int = 5, processes: Optional[int] = None
+) -> Iterator[int]:
     """
     Advent-coin generator for the given secret key. Returns only valid advent coin (i.e. beginning
     with the expected number of zeroes). Yielded values are the decimals which generated valid
     advent-coin.
     """
-    expected_beginning = "0" * leading_zeroes
-    for decimal in count(start=1, step=1):
-        attempt = secret_key + str(decimal)
-        hexdigest = md5(attempt.encode()).hexdigest()
-        if hexdigest[:leading_zeroes] == expected_beginning:
-            yield decimal
+    for decimal, _ in prefix_search(secret_key, "0" * leading_zeroes, 1, processes):
+        yield decimal
 
 
-def test_part1():
+def first_adventcoins(
+    secret_key: str, processes: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Find the first decimals producing advent-coin with five and six leading zeroes respectively,
+    answering both from a single ordered stream of five-zero hits.
+    """
+    five: Optional[int] = None
+    for decimal, hexdigest in prefix_search(secret_key, "00000", 1, processes):
+        if five is None:
+            five = decimal
+        if hexdigest.startswith("000000"):
+            return five, decimal
+    raise ValueError("prefix search ended unexpectedly")
+
+
+def benchmark(secret_key: str = "abcdef", hashes: int = 2_000_000) -> None:
+    """
+    Report the hashing rate achieved over the process pool, overall and per core. The prefix "g"
+    can never match a hexdigest, so every chunk does the full amount of hashing work.
+    """
+    workers = cpu_count() or 1
+    starts = range(0, hashes, CHUNK_SIZE)
+    stops = [chunk_start + CHUNK_SIZE for chunk_start in starts]
+    begin = perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(search_chunk, repeat(secret_key), repeat("g"), starts, stops))
+    rate = len(starts) * CHUNK_SIZE / (perf_counter() - begin)
+    print(
+        f"{rate:,.0f} hashes/s over {workers} cores ({rate / workers:,.0f} hashes/s per core)"
+    )
+
+
+def test_part1() -> None:
     """
     Example for Part 1.
     """
     assert next(adventcoin("abcdef")) == 609043
+    assert next(adventcoin("pqrstuv", processes=2)) == 1048970
+
+
+def test_prefix_search() -> None:
+    """
+    Hits from the parallel search come back in order and match a direct hash of each decimal.
+    """
+    hits = []
+    for decimal, hexdigest in prefix_search(
+        "abcdef", "000", processes=2, chunk_size=1000
+    ):
+        hits.append(decimal)
+        assert md5(f"abcdef{decimal}".encode()).hexdigest() == hexdigest
+        if len(hits) == 20:
+            break
+    assert hits == sorted(hits)
+    assert hits == [
+        decimal for decimal, _ in search_chunk("abcdef", "000", 0, hits[-1] + 1)
+    ]
 
 
-def main():
+def main() -> None:
     """
     Calculate and output the solutions based on the real puzzle input.
     """
     data = aocd.get_data(year=2015, day=4)
+    part1, part2 = first_adventcoins(data)
 
-    print(f"Part 1: {next(adventcoin(data))}")
-    print(f"Part 2: {next(adventcoin(data, 6))}")
+    print(f"Part 1: {part1}")
+    print(f"Part 2: {part2}")
 
 
 if __name__ == "__main__":
@@ -3,16 +3,20 @@
 https://adventofcode.com/2015/day/6
 """
 
-from typing import Callable, Iterable, Tuple
+from time import perf_counter
+from typing import Callable, Iterable, List, Tuple
+import random
 import aocd  # type: ignore
 import numpy as np
 
+Instruction = Tuple[str, Tuple[int, int], Tuple[int, int]]
 
-def empty_grid() -> np.ndarray:
+
+def empty_grid(dtype: type = np.int16) -> np.ndarray:
     """ "
     Create an empty 1000 by 1000 array of zeroes.
     """
-    return np.zeros((1000, 1000), dtype=int, order="C")
+    return np.zeros((1000, 1000), dtype=dtype, order="C")
 
 
 def act(
@@ -32,28 +36,25 @@ def act(
     )
 
 
-@np.vectorize
-def turned_on(_: int) -> int:
+def turned_on(region: np.ndarray) -> np.ndarray:
     """
     Turn on all cells in the region, i.e. set to 1.
     """
-    return 1
+    return np.ones_like(region)
 
 
-@np.vectorize
-def turned_off(_: int) -> int:
+def turned_off(region: np.ndarray) -> np.ndarray:
     """
     Turn off all cells in the region, i.e. set to 0.
     """
-    return 0
+    return np.zeros_like(region)
 
 
-@np.vectorize
-def toggled(value: int) -> int:
+def toggled(region: np.ndarray) -> np.ndarray:
     """
     Toggle all cells in the region.
     """
-    return 1 - value
+    return region ^ 1
 
 
 def read_coords(coords: str) -> Tuple[int, int]:
@@ -68,28 +69,110 @@ def read_coords(coords: str) -> Tuple[int, int]:
     return (x_coord, y_coord)
 
 
+def read_instruction(instruction: str) -> Instruction:
+    """
+    Read an instruction into a tuple (action, top_left, bottom_right), where action is one of "on",
+    "off" or "toggle".
+    """
+    words = instruction.split()
+    if words[0] == "toggle":
+        return ("toggle", read_coords(words[1]), read_coords(words[3]))
+    return (words[1], read_coords(words[2]), read_coords(words[4]))
+
+
 def process_instructions(
     instructions: Iterable[str],
     on_func: Callable[[np.ndarray], np.ndarray] = turned_on,
     off_func: Callable[[np.ndarray], np.ndarray] = turned_off,
     toggle_func: Callable[[np.ndarray], np.ndarray] = toggled,
+    compressed: bool = False,
 ) -> int:
     """
     Begin with an empty grid, run through the provided set of instructions using the provided
     vectorized functions, and return the total of the values in the modified grid.
+
+    The functions work on whole regions at once, as slice operations on an int16 grid. With
+    compressed, the instructions are instead run on a grid compressed to the coordinates where
+    regions start and end (see process_compressed), which works for grids of any size.
     """
+    funcs = {"on": on_func, "off": off_func, "toggle": toggle_func}
+    parsed = [read_instruction(instruction) for instruction in instructions]
+    if compressed:
+        return process_compressed(parsed, funcs)
+
     grid = empty_grid()
+    for action, top_left, bottom_right in parsed:
+        act(grid, funcs[action], top_left, bottom_right)
 
-    for instruction in instructions:
-        words = instruction.split()
-        if words[0] == "turn" and words[1] == "on":
-            act(grid, on_func, read_coords(words[2]), read_coords(words[4]))
-        elif words[0] == "turn" and words[1] == "off":
-            act(grid, off_func, read_coords(words[2]), read_coords(words[4]))
-        elif words[0] == "toggle":
-            act(grid, toggle_func, read_coords(words[1]), read_coords(words[3]))
+    return int(np.sum(grid, dtype=np.int64))
 
-    return np.sum(grid)
+
+def process_compressed(
+    instructions: List[Instruction],
+    funcs: dict[str, Callable[[np.ndarray], np.ndarray]],
+) -> int:
+    """
+    Run the instructions on a grid with a cell for each block of lights that every instruction
+    treats alike: the x (and y) coordinates are cut wherever a region starts or ends, so the grid
+    has at most 2n x 2n cells for n instructions, however large the space they cover. The total is
+    weighted by the number of lights in each cell. Lights outside every region stay at 0.
+    """
+    if not instructions:
+        return 0
+    xs = np.unique(
+        [tl[0] for _, tl, _ in instructions] + [br[0] + 1 for _, _, br in instructions]
+    )
+    ys = np.unique(
+        [tl[1] for _, tl, _ in instructions] + [br[1] + 1 for _, _, br in instructions]
+    )
+    grid = np.zeros((len(ys) - 1, len(xs) - 1), dtype=np.int32)
+
+    for action, (min_x, min_y), (max_x, max_y) in instructions:
+        rows = slice(np.searchsorted(ys, min_y), np.searchsorted(ys, max_y + 1))
+        cols = slice(np.searchsorted(xs, min_x), np.searchsorted(xs, max_x + 1))
+        grid[rows, cols] = funcs[action](grid[rows, cols])
+
+    weights = np.outer(np.diff(ys), np.diff(xs))
+    return int((grid.astype(np.int64) * weights).sum())
+
+
+def random_instructions(quantity: int, size: int = 1000, seed: int = 0) -> List[str]:
+    """
+    Generate instructions like the puzzle input's over a square grid of the given size.
+    """
+    rng = random.Random(seed)
+    instructions = []
+    for _ in range(quantity):
+        action = rng.choice(("turn on", "turn off", "toggle"))
+        x1, x2 = sorted(rng.randrange(size) for _ in range(2))
+        y1, y2 = sorted(rng.randrange(size) for _ in range(2))
+        instructions.append(f"{action} {x1},{y1} through {x2},{y2}")
+    return instructions
+
+
+def benchmark(quantities: Iterable[int] = (100, 300, 1000, 3000)) -> None:
+    """
+    Time both engines with increasing numbers of instructions on the 1000 by 1000 grid, and the
+    compressed engine on a 10^6 by 10^6 grid as well. With regions scattered at random over the
+    huge grid, the compressed grid grows with the square of the number of instructions, so that
+    engine suits sparse or modest instruction lists.
+    """
+    for quantity in quantities:
+        instructions = random_instructions(quantity)
+        huge = random_instructions(quantity, size=1_000_000)
+        timings = []
+        for lines, compressed in (
+            (instructions, False),
+            (instructions, True),
+            (huge, True),
+        ):
+            begin = perf_counter()
+            process_instructions(lines, turn_up, turn_down, turn_up_twice, compressed)
+            timings.append(perf_counter() - begin)
+        print(
+            f"{quantity:>6} instructions: grid {timings[0]:.3f}s, "
+            f"compressed {timings[1]:.3f}s, compressed 10^6 x 10^6 {timings[2]:.3f}s"
+        )
 
 
 def test_part1():
@@ -114,30 +197,40 @@ def test_part1():
         )
         == 998_996
     )
+    instructions = random_instructions(100, 50, seed=1)
+    assert process_instructions(instructions) == process_instructions(
+        instructions, compressed=True
+    )
+    assert process_instructions(
+        instructions, turn_up, turn_down, turn_up_twice
+    ) == process_instructions(
+        instructions, turn_up, turn_down, turn_up_twice, compressed=True
+    )
+    assert (
+        process_instructions(["toggle 0,0 through 999999,999999"], compressed=True)
+        == 10**12
+    )
 
 
-@np.vectorize
-def turn_up(value: int) -> int:
+def turn_up(region: np.ndarray) -> np.ndarray:
     """
     Turn up cells in the given region, i.e. increase brightness by 1.
     """
-    return value + 1
+    return region + 1
 
 
-@np.vectorize
-def turn_down(value: int) -> int:
+def turn_down(region: np.ndarray) -> np.ndarray:
     """
-    Turn down cells in the given region, i.e. decrease brightness by 1.
+    Turn down cells in the given region, i.e. decrease brightness by 1 (but not below 0).
     """
-    return 0 if value == 0 else value - 1
+    return region - (region > 0)
 
 
-@np.vectorize
-def turn_up_twice(value: int) -> int:
+def turn_up_twice(region: np.ndarray) -> np.ndarray:
     """
     Turn up cells in the given region twice, i.e. increase brightness by 2.
     """
-    return value + 2
+    return region + 2
 
 
 def main():
@@ -3,9 +3,10 @@
 https://adventofcode.com/2015/day/7
 """
 
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from operator import __or__, and_, or_, lshift, rshift
-from typing import Callable, Dict, Iterable, Union
+from typing import Callable, Deque, Dict, Iterable, List, Tuple, Union
 import aocd  # type: ignore
 
 Input = Union[int, str]
@@ -95,6 +96,121 @@ class Circuit:
 
         return cls(wires, cache)
 
+    def compile(self) -> "CompiledCircuit":
+        """
+        Sort the wires topologically (each after the wires it reads) and flatten them into a list
+        of operations on an array of registers, with a register for each wire and each constant.
+        """
+        names: Dict[str, int] = {}
+
+        def register(key: Input) -> int:
+            key = str(key)
+            if key not in names:
+                names[key] = len(names)
+            return names[key]
+
+        for target in self.wires:
+            register(target)
+        inputs = {
+            target: {str(wire.first), str(wire.second)} & self.wires.keys()
+            for target, wire in self.wires.items()
+        }
+        readers: Dict[str, List[str]] = {target: [] for target in self.wires}
+        for target, sources in inputs.items():
+            for source in sources:
+                readers[source].append(target)
+
+        waiting = {target: len(sources) for target, sources in inputs.items()}
+        ready: Deque[str] = deque(
+            target for target, count in waiting.items() if not count
+        )
+        order: List[str] = []
+        while ready:
+            target = ready.popleft()
+            order.append(target)
+            for reader in readers[target]:
+                waiting[reader] -= 1
+                if not waiting[reader]:
+                    ready.append(reader)
+        if len(order) < len(self.wires):
+            raise ValueError("The circuit contains a loop")
+
+        operations = [
+            (
+                self.wires[target].operator,
+                names[target],
+                register(self.wires[target].first),
+                register(self.wires[target].second),
+            )
+            for target in order
+        ]
+        registers = [
+            int(key) if key.isdigit() else 0
+            for key in sorted(names, key=names.__getitem__)
+        ]
+        return CompiledCircuit(names, operations, registers, readers, order)
+
+
+Operation = Tuple[Callable[[int, int], int], int, int, int]
+
+
+@dataclass
+class CompiledCircuit:
+    """
+    A circuit compiled to a flat list of operations (operator, target, first, second) over a list
+    of registers, in an order in which every operation's inputs are ready before it runs.
+    Registers for constants hold their values, and those for wires not driven by anything hold 0.
+    """
+
+    names: Dict[str, int]
+    operations: List[Operation]
+    registers: List[int]
+    readers: Dict[str, List[str]]
+    order: List[str]
+    downstream: Dict[str, List[Operation]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.run(self.registers, self.operations)
+
+    @staticmethod
+    def run(registers: List[int], operations: Iterable[Operation]) -> None:
+        for operator, target, first, second in operations:
+            registers[target] = operator(registers[first], registers[second])
+
+    def value(self, wire: str) -> int:
+        return self.registers[self.names[wire]]
+
+    def operations_downstream(self, wire: str) -> List[Operation]:
+        """
+        The operations for every wire that depends (directly or indirectly) on the given wire, in
+        the order they should run.
+        """
+        if wire not in self.downstream:
+            affected = set()
+            queue = deque(self.readers.get(wire, ()))
+            while queue:
+                target = queue.popleft()
+                if target not in affected:
+                    affected.add(target)
+                    queue.extend(self.readers[target])
+            position = {target: index for index, target in enumerate(self.order)}
+            self.downstream[wire] = [
+                self.operations[position[target]]
+                for target in sorted(affected, key=position.__getitem__)
+            ]
+        return self.downstream[wire]
+
+    def with_override(self, wire: str, signal: int) -> List[int]:
+        """
+        Return the registers resulting from the given wire being fed the given signal instead,
+        recomputing only the wires downstream of it. The circuit itself is left unchanged, so any
+        number of overrides can be tried one after another.
+        """
+        registers = self.registers[:]
+        registers[self.names[wire]] = signal
+        self.run(registers, self.operations_downstream(wire))
+        return registers
+
 
 def test_part1():
     """
@@ -124,20 +240,35 @@ def test_part1():
     ):
         assert circuit.evaluate(wire) == expected
 
+    compiled = circuit.compile()
+    assert compiled.value("d") == 72
+    assert compiled.value("i") == 65079
+    overridden = compiled.with_override("x", 1)
+    for wire, expected in (("d", 0), ("e", 457), ("f", 4), ("h", 65534), ("i", 65079)):
+        assert overridden[compiled.names[wire]] == expected
+    assert compiled.value("d") == 72
+
+    chain = Circuit.from_wire_descriptions(
+        ["1 -> w0"]
+        + [f"w{n} LSHIFT 1 -> w{n + 1}" for n in range(0, 5000, 2)]
+        + [f"w{n} RSHIFT 1 -> w{n + 1}" for n in range(1, 5000, 2)]
+    )
+    compiled = chain.compile()
+    assert compiled.value("w5000") == 1
+    assert compiled.with_override("w0", 3)[compiled.names["w5000"]] == 3
+
 
 def main():
     """
     Calculate and output the solutions based on the real puzzle input.
     """
     data = aocd.get_data(year=2015, day=7)
-    p1_circuit = Circuit.from_wire_descriptions(data.split("\n"))
+    circuit = Circuit.from_wire_descriptions(data.split("\n")).compile()
 
-    p1_result = p1_circuit.evaluate("a")
+    p1_result = circuit.value("a")
     print(f"Part 1: {p1_result}")
 
-    p2_circuit = Circuit.from_wire_descriptions(data.split("\n"))
-    p2_circuit.cache = {"b": p1_result}
-    p2_result = p2_circuit.evaluate("a")
+    p2_result = circuit.with_override("b", p1_result)[circuit.names["a"]]
     print(f"Part 2: {p2_result}")
 
 
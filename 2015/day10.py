@@ -3,27 +3,20 @@
 https://adventofcode.com/2015/day/10
 """
 
+from collections import Counter
+from itertools import groupby
+from typing import Dict, List, Set, Tuple
 import aocd  # type: ignore
 
+LOOKAHEAD = 12
+
 
 def look_and_say(word: str) -> str:
     """
     Replace each repeated pattern of digits in the given string with a set of characters describing
     the repeated pattern.
     """
-    result = ""
-    prev = word[0]
-    current_run = 0
-
-    for char in word:
-        if char == prev:
-            current_run += 1
-        else:
-            result += str(current_run) + prev
-            prev = char
-            current_run = 1
-
-    return result + str(current_run) + prev
+    return "".join(f"{sum(1 for _ in run)}{digit}" for digit, run in groupby(word))
 
 
 def look_and_say_repeatedly(word: str, times: int) -> str:
@@ -35,6 +28,95 @@ def look_and_say_repeatedly(word: str, times: int) -> str:
     return word
 
 
+# Conway showed that look-and-say strings split into 92 'elements' which each evolve without ever
+# interacting with their neighbours, so only the number of each element needs to be followed. A
+# string evolves piece by piece as long as neighbouring pieces never end and start with the same
+# digit (which would merge two runs). The last digit of a piece never changes, so splitting before
+# a piece whose first digit over the next LOOKAHEAD steps never matches the digit before it finds
+# the elements. Rather than trusting that, decay_table checks every pair of pieces that can ever be
+# neighbours, which makes the element counts exact.
+
+
+def splits_before(digit: str, rest: str) -> bool:
+    """
+    Whether a string can be split in front of rest, given the digit before it, judging by the first
+    digit of rest over the next LOOKAHEAD steps (which only depends on the start of rest).
+    """
+    prefix = rest[:40]
+    for _ in range(LOOKAHEAD):
+        if prefix[0] == digit:
+            return False
+        prefix = look_and_say(prefix)[:40]
+    return True
+
+
+def split_elements(word: str) -> List[str]:
+    """
+    Split a string into the pieces (elements) that evolve independently.
+    """
+    elements = []
+    start = 0
+    for split in range(1, len(word)):
+        if word[split - 1] != word[split] and splits_before(
+            word[split - 1], word[split:]
+        ):
+            elements.append(word[start:split])
+            start = split
+    elements.append(word[start:])
+    return elements
+
+
+def decay_table(word: str) -> Tuple[List[str], Dict[str, List[str]]]:
+    """
+    Split the string into elements, and find what every element reachable from them decays into
+    after one step. Raise ValueError if any two elements that could end up next to each other
+    would merge, in which case the string cannot be followed element by element.
+    """
+    elements = split_elements(word)
+    decays: Dict[str, List[str]] = {}
+    neighbours: Set[Tuple[str, str]] = set(zip(elements, elements[1:]))
+    pending = list(elements)
+    while pending:
+        element = pending.pop()
+        if element not in decays:
+            decays[element] = split_elements(look_and_say(element))
+            neighbours.update(zip(decays[element], decays[element][1:]))
+            pending.extend(decays[element])
+
+    unchecked = list(neighbours)
+    while unchecked:
+        left, right = unchecked.pop()
+        if left[-1] == right[0]:
+            raise ValueError(f"Elements {left} and {right} would merge")
+        pair = (decays[left][-1], decays[right][0])
+        if pair not in neighbours:
+            neighbours.add(pair)
+            unchecked.append(pair)
+
+    return elements, decays
+
+
+def look_and_say_length(word: str, times: int) -> int:
+    """
+    The length of the string after running look_and_say the given number of times, found by
+    counting elements with the decay table as a (sparse) transition matrix. Strings that can't be
+    split into elements are run through look_and_say_repeatedly instead.
+    """
+    try:
+        elements, decays = decay_table(word)
+    except ValueError:
+        return len(look_and_say_repeatedly(word, times))
+
+    counts = Counter(elements)
+    for _ in range(times):
+        decayed: Counter[str] = Counter()
+        for element, quantity in counts.items():
+            for product in decays[element]:
+                decayed[product] += quantity
+        counts = decayed
+    return sum(len(element) * quantity for element, quantity in counts.items())
+
+
 def test_example():
     """
     Examples from the puzzle description.
@@ -46,17 +128,27 @@ def test_example():
     assert look_and_say_repeatedly("1", 5) == "312211"
 
 
+def test_elements():
+    """
+    Element counting agrees with running look_and_say, and splits a typical puzzle input into
+    Conway's 92 elements.
+    """
+    for word in ("1", "211", "1113222113", "4"):
+        for times in (0, 5, 25):
+            assert look_and_say_length(word, times) == len(
+                look_and_say_repeatedly(word, times)
+            )
+    assert len(decay_table("1113222113")[1]) == 92
+
+
 def main():
     """
     Calculate and output the solutions based on the real puzzle input.
     """
     data = aocd.get_data(year=2015, day=10)
 
-    repeated = look_and_say_repeatedly(data, 40)
-    print(f"Part 1: {len(repeated)}")
-
-    repeated = look_and_say_repeatedly(repeated, 10)
-    print(f"Part 2: {len(repeated)}")
+    print(f"Part 1: {look_and_say_length(data, 40)}")
+    print(f"Part 2: {look_and_say_length(data, 50)}")
 
 
 if __name__ == "__main__":
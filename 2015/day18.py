@@ -3,7 +3,8 @@
 https://adventofcode.com/2015/day/18
 """
 
-from typing import Callable
+from time import perf_counter
+from typing import Callable, Iterable, Optional, Tuple
 import numpy as np
 import aocd  # type: ignore
 
@@ -52,14 +53,58 @@ def next_state(
     )
 
 
+def corner_mask(shape: Tuple[int, int]) -> np.ndarray:
+    """
+    A mask of the four corners of a grid, where the lights are stuck on.
+    """
+    mask = np.zeros(shape, dtype=bool)
+    mask[0, 0] = mask[0, -1] = mask[-1, 0] = mask[-1, -1] = True
+    return mask
+
+
+def next_state_vectorised(
+    state: np.ndarray, stuck: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Calculate the next state from the current state for the whole grid at once, counting each
+    cell's neighbours by adding up the eight shifted copies of the zero-padded grid. Any lights in
+    the stuck mask are turned back on afterwards.
+    """
+    rows, cols = state.shape
+    padded = np.pad(state.astype(np.uint8), 1)
+    neighbours = sum(
+        padded[1 + dy : 1 + dy + rows, 1 + dx : 1 + dx + cols]
+        for dy in (-1, 0, 1)
+        for dx in (-1, 0, 1)
+        if dy or dx
+    )
+    alive = (neighbours == 3) | ((neighbours == 2) & (state == 1))
+    if stuck is not None:
+        alive |= stuck
+    return alive.astype(state.dtype)
+
+
 def run_steps(
     grid: np.ndarray,
     steps: int,
     new_val_func: Callable[[np.ndarray, int, int], int] = new_value,
+    vectorised: bool = True,
+    stuck_corners: bool = False,
 ) -> np.ndarray:
     """
     Run X number of steps and return the result.
+
+    The vectorised kernel runs the standard rules when the function is new_value or
+    new_value_broken_light, with the corners stuck on if stuck_corners is set (or
+    new_value_broken_light is given). Any other function is called for every cell.
     """
+    if vectorised and new_val_func in (new_value, new_value_broken_light):
+        stuck_corners = stuck_corners or new_val_func is new_value_broken_light
+        stuck = corner_mask(grid.shape) if stuck_corners else None
+        for _ in range(steps):
+            grid = next_state_vectorised(grid, stuck)
+        return grid
+
     for _ in range(steps):
         grid = next_state(grid, new_val_func)
     return grid
@@ -76,6 +121,118 @@ def new_value_broken_light(grid: np.ndarray, y_coord: int, x_coord: int) -> int:
     return new_value(grid, y_coord, x_coord)
 
 
+# Bit-packed boards for very large grids: the whole grid is a single integer, with cell (y, x) at
+# bit y * (width + 1) + x. The extra column is always kept clear so that shifting the board left or
+# right doesn't carry lights from the end of one row to the start of the next.
+
+
+def pack(grid: np.ndarray) -> int:
+    """
+    Pack a grid of lights into a single integer.
+    """
+    padded = np.pad(grid.astype(bool), ((0, 0), (0, 1)))
+    return int.from_bytes(np.packbits(padded, bitorder="little").tobytes(), "little")
+
+
+def unpack(board: int, shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Unpack a board back into a grid of lights.
+    """
+    rows, cols = shape
+    size = rows * (cols + 1)
+    data = np.frombuffer(board.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    bits = np.unpackbits(data, count=size, bitorder="little")
+    return bits.reshape(rows, cols + 1)[:, :cols].astype(int)
+
+
+def next_board(board: int, stride: int, mask: int, stuck: int = 0) -> int:
+    """
+    Calculate the next state of a packed board. The eight neighbour boards (made by shifting) are
+    added together bitwise, keeping the count for every cell at once in three bits (the count
+    modulo 8, which is enough to tell counts of 2 and 3 apart from the rest).
+    """
+    ones = twos = fours = 0
+    for shift in (1, stride - 1, stride, stride + 1):
+        for neighbour in (board << shift, board >> shift):
+            carry = ones & neighbour
+            ones ^= neighbour
+            carry_two = twos & carry
+            twos ^= carry
+            fours ^= carry_two
+    return (twos & ~fours & (ones | board) & mask) | stuck
+
+
+def run_steps_packed(
+    grid: np.ndarray, steps: int, stuck_corners: bool = False
+) -> np.ndarray:
+    """
+    Run X number of steps on a bit-packed copy of the grid and return the result.
+    """
+    rows, cols = grid.shape
+    stride = cols + 1
+    mask = pack(np.ones(grid.shape, dtype=bool))
+    stuck = pack(corner_mask(grid.shape)) if stuck_corners else 0
+    board = pack(grid) | stuck
+    for _ in range(steps):
+        board = next_board(board, stride, mask, stuck)
+    return unpack(board, (rows, cols))
+
+
+def benchmark(sizes: Iterable[int] = (100, 1000, 5000), steps: int = 10) -> None:
+    """
+    Report steps per second for each engine on random square grids of increasing size. The
+    per-cell engine is only run on the smallest grid.
+    """
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        grid = rng.integers(0, 2, (size, size))
+        engines = [
+            ("vectorised", lambda: run_steps(grid, steps)),
+            ("bit-packed", lambda: run_steps_packed(grid, steps)),
+        ]
+        if size <= 100:
+            engines.append(("per-cell", lambda: run_steps(grid, 1, vectorised=False)))
+        for name, engine in engines:
+            begin = perf_counter()
+            engine()
+            elapsed = perf_counter() - begin
+            quantity = 1 if name == "per-cell" else steps
+            print(f"{size:>5} x {size:<5} {name}: {quantity / elapsed:,.1f} steps/s")
+
+
+def test_parts1and2():
+    """
+    Examples for Parts 1 and 2.
+    """
+    example = "\n".join((".#.#.#", "...##.", "#....#", "..#...", "#.#..#", "####.."))
+    grid = load_initial_grid(example)
+    expected = load_initial_grid(
+        "\n".join(("......", "......", "..##..", "..##..", "......", "......"))
+    )
+    assert (run_steps(grid, 4, vectorised=False) == expected).all()
+    assert (run_steps(grid, 4) == expected).all()
+    assert (run_steps_packed(grid, 4) == expected).all()
+
+    grid = load_initial_grid(example, fix_corners=True)
+    assert run_steps(grid, 5, new_value_broken_light, vectorised=False).sum() == 17
+    assert run_steps(grid, 5, stuck_corners=True).sum() == 17
+    assert run_steps_packed(grid, 5, stuck_corners=True).sum() == 17
+
+    random_grid = np.random.default_rng(1).integers(0, 2, (30, 45))
+    assert (run_steps(random_grid, 20) == run_steps_packed(random_grid, 20)).all()
+
+
+def test_custom_rule():
+    """
+    A function other than new_value or new_value_broken_light is still called for every cell.
+    """
+    grid = load_initial_grid("\n".join(("#..", "...", "..#")))
+    inverted = run_steps(
+        grid, 1, lambda grid, y_coord, x_coord: 1 - grid[y_coord, x_coord]
+    )
+    assert (inverted == 1 - grid).all()
+
+
 def main():
     """
     Calculate and output the solutions based on the real puzzle input.
@@ -86,7 +243,7 @@ def main():
     print(f"Part 1: {run_steps(grid, 100).sum()}")
 
     grid = load_initial_grid(data, fix_corners=True)
-    print(f"Part 2: {run_steps(grid, 100, new_value_broken_light).sum()}")
+    print(f"Part 2: {run_steps(grid, 100, stuck_corners=True).sum()}")
 
 
 if __name__ == "__main__":
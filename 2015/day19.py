@@ -3,10 +3,15 @@
 https://adventofcode.com/2015/day/19
 """
 
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Set
+from typing import Dict, Iterable, List, Optional, Pattern, Set
+import random
+import re
 import aocd  # type: ignore
 
+RE_ELEMENT = re.compile(r"[A-Z][a-z]?|e")
+
 
 @dataclass(frozen=True)
 class Replacement:
@@ -38,12 +43,50 @@ class Replacement:
         return replacements
 
 
-def possible_moves(molecule: str, replacements: Set[Replacement]) -> Set[str]:
+def replacement_index(
+    replacements: Iterable[Replacement],
+) -> Dict[str, List[Replacement]]:
+    """
+    Group the replacements by the first character of the text they replace.
+    """
+    index: Dict[str, List[Replacement]] = defaultdict(list)
+    for replacement in replacements:
+        index[replacement.replace[0]].append(replacement)
+    return index
+
+
+def replacement_pattern(replacements: Iterable[Replacement]) -> Pattern[str]:
+    """
+    Compile a single regular expression matching (as a zero-width lookahead, so that overlapping
+    matches are all found) every position at which any of the replacements could be made.
+    """
+    keys = sorted({replacement.replace for replacement in replacements}, key=len)
+    return re.compile(f"(?=({'|'.join(re.escape(key) for key in reversed(keys))}))")
+
+
+def possible_moves(
+    molecule: str, replacements: Set[Replacement], indexed: bool = True
+) -> Set[str]:
     """
     Given the set of available replacements and the current molecule, determine which possible
     resulting molecules can be moved to from this state.
+
+    When indexed, the positions at which any replacement could be made are found in one pass with
+    replacement_pattern, and only the replacements starting with the character there are tried.
     """
     possible = set()
+    if indexed:
+        index = replacement_index(replacements)
+        for match in replacement_pattern(replacements).finditer(molecule):
+            start = match.start()
+            for replacement in index[molecule[start]]:
+                if molecule.startswith(replacement.replace, start):
+                    end = start + len(replacement.replace)
+                    possible.add(
+                        molecule[:start] + replacement.replace_with + molecule[end:]
+                    )
+        return possible
+
     for replacement in replacements:
         for start in range(len(molecule)):
             end = start + len(replacement.replace)
@@ -54,7 +97,111 @@ def possible_moves(molecule: str, replacements: Set[Replacement]) -> Set[str]:
     return possible
 
 
-def fewest_steps(replacements: Set[Replacement], target: str) -> int:
+def count_elements(molecule: str) -> Dict[str, int]:
+    """
+    Count the elements (a capital letter, optionally followed by a lower-case letter) in a
+    molecule.
+    """
+    counts: Dict[str, int] = defaultdict(int)
+    for element in RE_ELEMENT.findall(molecule):
+        counts[element] += 1
+    return counts
+
+
+def token_formula_applies(replacements: Iterable[Replacement]) -> bool:
+    """
+    Whether the grammar has the shape which makes the number of steps depend only on the molecule.
+    Rn, Y and Ar are never replaced, and every replacement adds one element, plus one for each Rn
+    or Ar and two for each Y it introduces (X => AB, X => ARnBAr, X => ARnBYCAr and so on).
+    """
+    for replacement in replacements:
+        if replacement.replace in ("Rn", "Y", "Ar"):
+            return False
+        added = count_elements(replacement.replace_with)
+        growth = sum(added.values()) - sum(count_elements(replacement.replace).values())
+        if growth != 1 + added["Rn"] + added["Ar"] + 2 * added["Y"]:
+            return False
+    return True
+
+
+def steps_by_token_formula(target: str) -> int:
+    """
+    The number of steps needed to make the molecule from 'e' under a grammar for which
+    token_formula_applies. As each step adds 1 + #Rn + #Ar + 2 * #Y elements, every way of making
+    the molecule takes the same number of steps: one less than its elements, less its Rn and Ar
+    elements, less twice its Y elements.
+    """
+    counts = count_elements(target)
+    return sum(counts.values()) - counts["Rn"] - counts["Ar"] - 2 * counts["Y"] - 1
+
+
+def greedy_reduction(
+    replacements: Set[Replacement],
+    target: str,
+    seed: int = 0,
+    restarts: int = 1000,
+) -> int:
+    """
+    Reduce the medicine back to 'e' by undoing replacements greedily: the replacements are taken in
+    a random order, and the first one that can be undone is undone everywhere it can be, before
+    starting again from the first. If the molecule gets stuck before reaching 'e', the replacements
+    are shuffled and it starts over, up to the given number of times. Only the current molecule is
+    kept, and the number of steps found is not guaranteed to be the fewest.
+    """
+    rng = random.Random(seed)
+    reverse = [replacement.reverse() for replacement in replacements]
+    for _ in range(restarts):
+        rng.shuffle(reverse)
+        molecule, steps = target, 0
+        while molecule != "e":
+            for replacement in reverse:
+                found = molecule.count(replacement.replace)
+                if found and (
+                    replacement.replace_with != "e" or molecule == replacement.replace
+                ):
+                    molecule = molecule.replace(
+                        replacement.replace, replacement.replace_with
+                    )
+                    steps += found
+                    break
+            else:
+                break
+        if molecule == "e":
+            return steps
+    raise ValueError("Greedy reduction got stuck on every attempt")
+
+
+def random_derivation(replacements: Set[Replacement], steps: int, seed: int = 0) -> str:
+    """
+    Build a molecule by making the given number of random replacements, starting from 'e'.
+    """
+    rng = random.Random(seed)
+    molecule = "e"
+    for _ in range(steps):
+        molecule = rng.choice(sorted(possible_moves(molecule, replacements)))
+    return molecule
+
+
+def fewest_steps(
+    replacements: Set[Replacement], target: str, method: Optional[str] = None
+) -> int:
+    """
+    Identify the fewest number of steps needed to transform 'e' into the medicine.
+
+    By default the token formula is used if the grammar allows it, falling back to "search". The
+    method can be given as "formula", "greedy" (see greedy_reduction) or "search", a best-first
+    search goal-seeking in the opposite direction.
+    """
+    if method is None:
+        method = "formula" if token_formula_applies(replacements) else "search"
+    if method == "formula":
+        return steps_by_token_formula(target)
+    if method == "greedy":
+        return greedy_reduction(replacements, target)
+    return fewest_steps_by_search(replacements, target)
+
+
+def fewest_steps_by_search(replacements: Set[Replacement], target: str) -> int:
     """
     Identify the fewest number of steps needed to transform 'e' into the medicine - by goal-seeking
     in the opposite direction.
@@ -83,6 +230,62 @@ def fewest_steps(replacements: Set[Replacement], target: str) -> int:
     return -1
 
 
+def test_part1():
+    """
+    Examples for Part 1.
+    """
+    replacements = Replacement.all_from_input("H => HO\nH => OH\nO => HH")
+    for indexed in (True, False):
+        assert possible_moves("HOH", replacements, indexed) == {
+            "HOOH",
+            "HOHO",
+            "OHOH",
+            "HHHH",
+        }
+        assert len(possible_moves("HOHOHO", replacements, indexed)) == 7
+
+
+def test_part2():
+    """
+    Examples for Part 2, and the token formula checked against random molecules.
+    """
+    replacements = Replacement.all_from_input(
+        "e => H\ne => O\nH => HO\nH => OH\nO => HH"
+    )
+    assert not token_formula_applies(replacements)
+    assert fewest_steps(replacements, "HOH") == 3
+    assert fewest_steps(replacements, "HOHOHO") == 6
+    assert greedy_reduction(replacements, "HOHOHO") == 6
+
+    replacements = Replacement.all_from_input(
+        "\n".join(
+            (
+                "e => HF",
+                "e => NAl",
+                "Al => ThF",
+                "Al => ThRnFAr",
+                "F => CaF",
+                "F => SiAl",
+                "H => CRnAlAr",
+                "H => CRnFYFYFAr",
+                "H => HCa",
+                "H => NTh",
+                "Ca => CaCa",
+                "Ca => SiRnFYFAr",
+                "Ca => SiTh",
+                "N => HSi",
+                "Si => CaSi",
+                "Th => ThCa",
+            )
+        )
+    )
+    assert token_formula_applies(replacements)
+    for seed in range(5):
+        molecule = random_derivation(replacements, 40, seed)
+        assert fewest_steps(replacements, molecule) == 40
+        assert greedy_reduction(replacements, molecule, seed) == 40
+
+
 def main():
     """
     Calculate and output the solutions based on the real puzzle input.
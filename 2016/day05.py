@@ -3,17 +3,42 @@
 https://adventofcode.com/2016/day/5
 """
 
-from functools import lru_cache
-from hashlib import md5
+from typing import Iterator, List, Optional, Tuple
 import aocd  # type: ignore
+from adventofcode.hashing import CHUNK_SIZE, prefix_search, search_chunk
 
 
-@lru_cache
-def md5hash(door: str, index: int) -> str:
+def interesting_hashes(
+    door: str,
+    prefix: str = "00000",
+    processes: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[str]:
     """
-    Calculate the md5 hash for the given Door ID and integer index.
+    Ordered stream of the hashes for the given door which begin with the given prefix.
     """
-    return md5((door + str(index)).encode("utf-8")).hexdigest()
+    for _, hexdigest in prefix_search(door, prefix, 0, processes, chunk_size):
+        yield hexdigest
+
+
+def create_passwords(
+    door: str, processes: Optional[int] = None, chunk_size: int = CHUNK_SIZE
+) -> Tuple[str, str]:
+    """
+    Create the passwords for the given door using both the part 1 algorithm (the sixth character
+    of each of the first eight hashes beginning with five 0s) and the part 2 algorithm, reading
+    both from a single ordered stream of hashes.
+    """
+    password = ""
+    password2: List[Optional[str]] = [None] * 8
+    for hsh in interesting_hashes(door, processes=processes, chunk_size=chunk_size):
+        if len(password) < 8:
+            password += hsh[5]
+        if hsh[5] in "01234567" and password2[int(hsh[5])] is None:
+            password2[int(hsh[5])] = hsh[6]
+        if len(password) == 8 and all(password2):
+            break
+    return password, "".join(digit or "" for digit in password2)
 
 
 def create_password(door: str) -> str:
@@ -22,12 +47,10 @@ def create_password(door: str) -> str:
     hashes beginning with five 0s.
     """
     password = ""
-    index = 0
-    while len(password) < 8:
-        hsh = md5hash(door, index)
-        if hsh[:5] == "00000":
-            password += hsh[5]
-        index += 1
+    for hsh in interesting_hashes(door):
+        password += hsh[5]
+        if len(password) == 8:
+            break
     return password
 
 
@@ -36,28 +59,45 @@ def create_password2(door: str) -> str:
     Create the password using the part 2 algorithm.
     """
     password: list[str] = ["z", "z", "z", "z", "z", "z", "z", "z"]
-    index = 0
-    while any(digit == "z" for digit in password) > 0:
-        hsh = md5hash(door, index)
-        if hsh[:5] == "00000":
-            try:
-                digit = int(hsh[5])
-            except ValueError:
-                digit = 8
-            if digit <= 7 and password[digit] == "z":
-                password[digit] = hsh[6]
-        index += 1
+    for hsh in interesting_hashes(door):
+        if hsh[5] in "01234567" and password[int(hsh[5])] == "z":
+            password[int(hsh[5])] = hsh[6]
+        if "z" not in password:
+            break
     return "".join(password)
 
 
+def test_search_chunk() -> None:
+    """
+    The first interesting hash for the example door, found directly and from the stream.
+    """
+    assert search_chunk("abc", "00000", 3231920, 3231940) == [
+        (3231929, "00000155f8105dff7f56ee10fa9b9abd")
+    ]
+    assert next(interesting_hashes("abc", processes=2, chunk_size=10_000)) == (
+        "00000155f8105dff7f56ee10fa9b9abd"
+    )
+
+
+def test_parts1and2() -> None:
+    """
+    Examples for Parts 1 and 2.
+    """
+    assert create_passwords("abc", processes=2, chunk_size=10_000) == (
+        "18f47a30",
+        "05ace8e3",
+    )
+
+
 def main() -> None:
     """
     Calculate and output the solutions based on the real puzzle input.
     """
     data = aocd.get_data(year=2016, day=5)
+    part1, part2 = create_passwords(data)
 
-    print(f"Part 1: {create_password(data)}")
-    print(f"Part 2: {create_password2(data)}")
+    print(f"Part 1: {part1}")
+    print(f"Part 2: {part2}")
 
 
 if __name__ == "__main__":
@@ -3,13 +3,18 @@
 https://adventofcode.com/2016/day/14
 """
 
+from collections import defaultdict, deque
 from dataclasses import dataclass
 from hashlib import md5
-from typing import Iterator, List
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
 import re
 import aocd  # type: ignore
+from adventofcode.hashing import ordered_chunks
 
+CHUNK_SIZE = 500
 RE_THREEPEATS = re.compile(r"(\w)\1{2,2}")
+RE_QUINTUPLES = re.compile(r"(\w)\1{4,4}")
+WINDOW = 1001
 
 
 def first_threepeat(text: str) -> str:
@@ -52,39 +57,85 @@ class KeyCandidate:
     matched: int
 
 
+def hash_chunk(
+    salt: str, stretched: bool, start: int, stop: int
+) -> List[Tuple[str, str, str]]:
+    """
+    Calculate the hashes for the indices in the range [start, stop), each alongside its first
+    threepeated character and every character it contains five times in a row.
+    """
+    create_hash = stretched_hash if stretched else md5hex
+    hashes = []
+    for index in range(start, stop):
+        hsh = create_hash(salt + str(index))
+        quintuples = "".join(sorted(set(RE_QUINTUPLES.findall(hsh))))
+        hashes.append((hsh, first_threepeat(hsh), quintuples))
+    return hashes
+
+
+def hash_stream(
+    salt: str,
+    stretched: bool = False,
+    processes: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Tuple[str, str, str]]:
+    """
+    Ordered stream of the (hash, threepeat, quintuples) details for each index in turn, computed
+    ahead of time in parallel chunks.
+    """
+    return ordered_chunks(hash_chunk, (salt, stretched), 0, processes, chunk_size)
+
+
 def find_keys(
-    salt: str, quantity: int, stretched: bool = False
+    salt: str, quantity: int, stretched: bool = False, processes: Optional[int] = None
 ) -> Iterator[KeyCandidate]:
     """
     Search for an appropriate quantity of keys (i.e. exploring candidates with a triple character
     and checking for a hash in the next 1000 in the stream containing five of the character).
+
+    Hashes are held in a ring window of the candidate plus the following 1000, and the indices
+    within that window containing each quintupled character are kept in order, so checking a
+    candidate is a dictionary lookup.
     """
     returned = 0
-    index = 0
-    candidates: List[KeyCandidate] = []
-    create_hash = stretched_hash if stretched else md5hex
-
-    while returned < quantity:
-        hsh = create_hash(salt + str(index))
-        candidates = [
-            candidate for candidate in candidates if candidate.index >= (index - 1000)
-        ]
-        paired = [candidate for candidate in candidates if candidate.char * 5 in hsh]
-
-        if paired:
-            for candidate in paired:
-                candidate.matched = index
-
-        char = first_threepeat(hsh)
-        if char:
-            candidates.append(KeyCandidate(hsh, char, index, -1))
-
-        if len(candidates) > 0 and candidates[0].matched > -1:
-            candidate, *candidates = candidates
-            yield candidate
+    window: Deque[Tuple[int, str, str, str]] = deque(maxlen=WINDOW)
+    quintuples: Dict[str, Deque[int]] = defaultdict(deque)
+
+    for index, (hsh, char, quints) in enumerate(
+        hash_stream(salt, stretched, processes)
+    ):
+        if len(window) == WINDOW:
+            for expired in window[0][3]:
+                quintuples[expired].popleft()
+        window.append((index, hsh, char, quints))
+        for quint in quints:
+            quintuples[quint].append(index)
+
+        if len(window) < WINDOW:
+            continue
+
+        candidate_index, candidate_hash, candidate_char, _ = window[0]
+        matched = next(
+            (
+                match
+                for match in quintuples.get(candidate_char, ())
+                if match > candidate_index
+            ),
+            -1,
+        )
+        if matched > -1:
+            yield KeyCandidate(candidate_hash, candidate_char, candidate_index, matched)
             returned += 1
+            if returned == quantity:
+                return
+
 
-        index += 1
+def test_part1() -> None:
+    """
+    Example for Part 1.
+    """
+    *_, key = find_keys("abc", 64, processes=1)
+    assert key.index == 22728
 
 
 def main() -> None:
@@ -3,6 +3,7 @@
 https://adventofcode.com/2017/day/21
 """
 
+from collections import Counter
 from typing import Dict, Tuple
 import numpy as np
 import aocd  # type: ignore
@@ -17,6 +18,8 @@ def array_from_graphic(graphic: str) -> np.ndarray:
 class Rulebook:
     def __init__(self) -> None:
         self.rules: Dict[Tuple[int, ...], np.ndarray] = {}
+        self.expansions: Dict[Tuple[int, ...], Counter[Tuple[int, ...]]] = {}
+        self.lit_pixels: Dict[Tuple[Tuple[int, ...], int], int] = {}
 
     @staticmethod
     def tuplify(nparray: np.ndarray) -> Tuple[int, ...]:
@@ -54,6 +57,56 @@ class Rulebook:
             [self.enhance_row(row, segments) for row in np.vsplit(image, segments)]
         )
 
+    def expand_block(self, block: Tuple[int, ...]) -> Counter[Tuple[int, ...]]:
+        """
+        Enhance a 3x3 block three times (to 4x4, 6x6 and then 9x9) and count the nine 3x3 blocks
+        the result splits into. Each of those goes on to be enhanced independently of the rest of
+        the image, so this is all that is needed to follow a 3x3 block over three iterations.
+        """
+        if block not in self.expansions:
+            image = np.array(block).reshape(3, 3)
+            for _ in range(3):
+                image = self.enhance_image(image)
+            self.expansions[block] = Counter(
+                self.tuplify(image[row : row + 3, col : col + 3])
+                for row in range(0, 9, 3)
+                for col in range(0, 9, 3)
+            )
+        return self.expansions[block]
+
+    def block_lit_pixels(self, block: Tuple[int, ...], iterations: int) -> int:
+        """
+        Count the pixels lit after enhancing a 3x3 block fewer than three times.
+        """
+        if (block, iterations) not in self.lit_pixels:
+            image = enhance_x_times(np.array(block).reshape(3, 3), self, iterations)
+            self.lit_pixels[block, iterations] = int(image.sum())
+        return self.lit_pixels[block, iterations]
+
+
+def count_lit_pixels(image: np.ndarray, rulebook: Rulebook, iterations: int) -> int:
+    """
+    Count the pixels lit after enhancing a 3x3 image the given number of times, without building
+    the image. Instead the number of each type of 3x3 block is kept, moving three iterations at a
+    time using Rulebook.expand_block, so memory stays bounded by the number of block types (at
+    most 512) however many iterations are made.
+    """
+    if image.shape != (3, 3):
+        raise ValueError("Only 3x3 images can be expanded a block at a time")
+
+    blocks: Counter[Tuple[int, ...]] = Counter([Rulebook.tuplify(image)])
+    for _ in range(iterations // 3):
+        expanded: Counter[Tuple[int, ...]] = Counter()
+        for block, quantity in blocks.items():
+            for new_block, new_quantity in rulebook.expand_block(block).items():
+                expanded[new_block] += quantity * new_quantity
+        blocks = expanded
+
+    return sum(
+        quantity * rulebook.block_lit_pixels(block, iterations % 3)
+        for block, quantity in blocks.items()
+    )
+
 
 def enhance_x_times(
     image: np.ndarray, rulebook: Rulebook, iterations: int
@@ -63,6 +116,46 @@ def enhance_x_times(
     return image
 
 
+def random_rulebook(seed: int = 0) -> Rulebook:
+    """
+    Rulebook with a random result for every possible 2x2 and 3x3 pattern.
+    """
+    rng = np.random.default_rng(seed)
+    rulebook = Rulebook()
+    for size in (2, 3):
+        for pattern in range(2 ** (size * size)):
+            bits = [(pattern >> bit) & 1 for bit in range(size * size)]
+            rulebook.add_rule(
+                np.array(bits).reshape(size, size),
+                rng.integers(0, 2, (size + 1, size + 1)),
+            )
+    return rulebook
+
+
+def test_part1() -> None:
+    """
+    Example for Part 1.
+    """
+    rulebook = Rulebook()
+    rulebook.add_rules_from_input(
+        "\n".join(("../.# => ##./#../...", ".#./..#/### => #..#/..../..../#..#"))
+    )
+    image = array_from_graphic(".#./..#/###")
+    assert enhance_x_times(image, rulebook, 2).sum() == 12
+    assert count_lit_pixels(image, rulebook, 2) == 12
+
+
+def test_count_lit_pixels() -> None:
+    """
+    Counting blocks matches building the whole image, using a random complete rulebook.
+    """
+    rulebook = random_rulebook()
+    image = array_from_graphic(".#./..#/###")
+    for iterations in range(13):
+        expected = enhance_x_times(image, rulebook, iterations).sum()
+        assert count_lit_pixels(image, rulebook, iterations) == expected
+
+
 def main() -> None:
     """
     Calculate and output the solutions based on the real puzzle input.
@@ -73,11 +166,8 @@ def main() -> None:
     rulebook.add_rules_from_input(data)
     image = array_from_graphic(".#./..#/###")
 
-    five = enhance_x_times(image, rulebook, 5)
-    print(f"Part 1: {five.sum()}")
-
-    eighteen = enhance_x_times(five, rulebook, 18 - 5)
-    print(f"Part 2: {eighteen.sum()}")
+    print(f"Part 1: {count_lit_pixels(image, rulebook, 5)}")
+    print(f"Part 2: {count_lit_pixels(image, rulebook, 18)}")
 
 
 if __name__ == "__main__":
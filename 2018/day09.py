@@ -3,7 +3,12 @@
 https://adventofcode.com/2018/day/9
 """
 
+from array import array
+from collections import deque
+from time import perf_counter
+from typing import Callable, Dict
 import re
+import tracemalloc
 import aocd  # type: ignore
 
 RE_SCENARIO = re.compile(r"(\d+) players; last marble is worth (\d+) points")
@@ -49,7 +54,7 @@ class Marble:
         return self
 
 
-def play_game(players: int, last_marble: int) -> int:
+def play_game_linked(players: int, last_marble: int) -> int:
     collected = dict((player, 0) for player in range(players))
     player = 0
 
@@ -69,6 +74,63 @@ def play_game(players: int, last_marble: int) -> int:
     return max(score for (player, score) in collected.items())
 
 
+def play_game_deque(players: int, last_marble: int) -> int:
+    scores = array("Q", bytes(8 * players))
+    circle = deque([0])
+
+    for marble_no in range(1, last_marble + 1):
+        if marble_no % 23 == 0:
+            circle.rotate(7)
+            scores[marble_no % players] += marble_no + circle.pop()
+            circle.rotate(-1)
+        else:
+            circle.rotate(-1)
+            circle.append(marble_no)
+
+    return max(scores)
+
+
+BACKENDS: Dict[str, Callable[[int, int], int]] = {
+    "deque": play_game_deque,
+    "linked": play_game_linked,
+}
+
+
+def play_game(players: int, last_marble: int, backend: str = "deque") -> int:
+    return BACKENDS[backend](players, last_marble)
+
+
+def compare_backends(players: int = 452, last_marble: int = 7_125_000) -> None:
+    """
+    Play the same game with each backend, reporting runtime and peak memory side by side.
+    """
+    for backend in BACKENDS:
+        tracemalloc.start()
+        begin = perf_counter()
+        score = play_game(players, last_marble, backend)
+        elapsed = perf_counter() - begin
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{backend:>8}: {score} in {elapsed:.2f}s, peak {peak / 2**20:.1f} MiB")
+
+
+def test_part1() -> None:
+    """
+    Examples for Part 1.
+    """
+    examples = [
+        (9, 25, 32),
+        (10, 1618, 8317),
+        (13, 7999, 146373),
+        (17, 1104, 2764),
+        (21, 6111, 54718),
+        (30, 5807, 37305),
+    ]
+    for backend in BACKENDS:
+        for players, last_marble, high_score in examples:
+            assert play_game(players, last_marble, backend) == high_score
+
+
 def main() -> None:
     """
     Calculate and output the solutions based on the real puzzle input.
@@ -3,33 +3,39 @@
 https://adventofcode.com/2018/day/10
 """
 
+from typing import TYPE_CHECKING
 import re
 import aocd  # type: ignore
-import pandas as pd  # type: ignore
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd  # type: ignore
 
 re_point = re.compile(
     r"position=<([- \d]+), ([- \d]+)> velocity=<([- \d]+), ([- \d]+)>"
 )
 
 
-def dataframe_from_input(text: str) -> pd.DataFrame:
+def dataframe_from_input(text: str) -> "pd.DataFrame":
+    import pandas as pd  # type: ignore  # pylint: disable=import-outside-toplevel
+
     points = [map(int, point) for point in re_point.findall(text)]
     return pd.DataFrame(points, columns=("x", "y", "vx", "vy"), dtype="int64")
 
 
-def valuerange(series: pd.Series) -> int:
+def valuerange(series: "pd.Series") -> int:
     return series.max() - series.min()
 
 
-def y_values_after_seconds(dataframe: pd.DataFrame, seconds: int) -> pd.Series:
+def y_values_after_seconds(dataframe: "pd.DataFrame", seconds: int) -> "pd.Series":
     return dataframe["vy"] * seconds + dataframe["y"]
 
 
-def x_values_after_seconds(dataframe: pd.DataFrame, seconds: int) -> pd.Series:
+def x_values_after_seconds(dataframe: "pd.DataFrame", seconds: int) -> "pd.Series":
     return dataframe["vx"] * seconds + dataframe["x"]
 
 
-def find_message_second(dataframe: pd.DataFrame) -> int:
+def find_message_second(dataframe: "pd.DataFrame") -> int:
     second = 0
     y_height = valuerange(dataframe["y"])
 
@@ -41,7 +47,7 @@ def find_message_second(dataframe: pd.DataFrame) -> int:
         y_height = new_y_height
 
 
-def print_message(dataframe: pd.DataFrame, seconds: int) -> str:
+def print_message(dataframe: "pd.DataFrame", seconds: int) -> str:
     x_values = x_values_after_seconds(dataframe, seconds)
     y_values = y_values_after_seconds(dataframe, seconds)
     points = set(zip(x_values, y_values))
@@ -55,15 +61,119 @@ def print_message(dataframe: pd.DataFrame, seconds: int) -> str:
     )
 
 
+def array_from_input(text: str) -> np.ndarray:
+    """
+    Read the points into an array with a row (x, y, vx, vy) for each.
+    """
+    return np.array(
+        [[int(val) for val in point] for point in re_point.findall(text)],
+        dtype=np.int64,
+    )
+
+
+def estimate_message_second(points: np.ndarray) -> int:
+    """
+    Estimate the second at which the points converge, as the time minimising the spread of y
+    values in the least squares sense: the variance of y + vy * t is smallest when
+    t = -sum((y - mean y) * (vy - mean vy)) / sum((vy - mean vy) ** 2).
+    """
+    y_gap = points[:, 1] - points[:, 1].mean()
+    vy_gap = points[:, 3] - points[:, 3].mean()
+    return max(int(round(-(y_gap * vy_gap).sum() / (vy_gap**2).sum())), 0)
+
+
+def converge_second(points: np.ndarray, window: int = 3) -> int:
+    """
+    Find the second at which the points are closest together vertically (where the message
+    appears), checking the seconds within a small window around the least squares estimate all at
+    once.
+    """
+    estimate = estimate_message_second(points)
+    seconds = np.arange(max(estimate - window, 0), estimate + window + 1)
+    y_values = points[:, 1] + np.outer(seconds, points[:, 3])
+    heights = y_values.max(1) - y_values.min(1)
+    return int(seconds[heights.argmin()])
+
+
+def render_message(points: np.ndarray, seconds: int) -> str:
+    """
+    Draw the points as they are after the given number of seconds, via a boolean raster.
+    """
+    x_values = points[:, 0] + points[:, 2] * seconds
+    y_values = points[:, 1] + points[:, 3] * seconds
+    raster = np.zeros(
+        (y_values.max() - y_values.min() + 1, x_values.max() - x_values.min() + 1),
+        dtype=bool,
+    )
+    raster[y_values - y_values.min(), x_values - x_values.min()] = True
+    return "\n".join("".join("#" if lit else " " for lit in row) for row in raster)
+
+
+def test_part1and2() -> None:
+    """
+    Example for Parts 1 and 2.
+    """
+    text = "\n".join(
+        (
+            "position=< 9,  1> velocity=< 0,  2>",
+            "position=< 7,  0> velocity=<-1,  0>",
+            "position=< 3, -2> velocity=<-1,  1>",
+            "position=< 6, 10> velocity=<-2, -1>",
+            "position=< 2, -4> velocity=< 2,  2>",
+            "position=<-6, 10> velocity=< 2, -2>",
+            "position=< 1,  8> velocity=< 1, -1>",
+            "position=< 1,  7> velocity=< 1,  0>",
+            "position=<-3, 11> velocity=< 1, -2>",
+            "position=< 7,  6> velocity=<-1, -1>",
+            "position=<-2,  3> velocity=< 1,  0>",
+            "position=<-4,  3> velocity=< 2,  0>",
+            "position=<10, -3> velocity=<-1,  1>",
+            "position=< 5, 11> velocity=< 1, -2>",
+            "position=< 4,  7> velocity=< 0, -1>",
+            "position=< 8, -2> velocity=< 0,  1>",
+            "position=<15,  0> velocity=<-2,  0>",
+            "position=< 1,  6> velocity=< 1,  0>",
+            "position=< 8,  9> velocity=< 0, -1>",
+            "position=< 3,  3> velocity=<-1,  1>",
+            "position=< 0,  5> velocity=< 0, -1>",
+            "position=<-2,  2> velocity=< 2,  0>",
+            "position=< 5, -2> velocity=< 1,  2>",
+            "position=< 1,  4> velocity=< 2,  1>",
+            "position=<-2,  7> velocity=< 2, -2>",
+            "position=< 3,  6> velocity=<-1, -1>",
+            "position=< 5,  0> velocity=< 1,  0>",
+            "position=<-6,  0> velocity=< 2,  0>",
+            "position=< 5,  9> velocity=< 1, -2>",
+            "position=<14,  7> velocity=<-2,  0>",
+            "position=<-3,  6> velocity=< 2, -1>",
+        )
+    )
+    points = array_from_input(text)
+    assert points.shape == (31, 4)
+    assert converge_second(points) == 3
+    assert render_message(points, 3) == "\n".join(
+        (
+            "#   #  ###",
+            "#   #   # ",
+            "#   #   # ",
+            "#####   # ",
+            "#   #   # ",
+            "#   #   # ",
+            "#   #   # ",
+            "#   #  ###",
+        )
+    )
+
+
 def main() -> None:
     """
     Calculate and output the solutions based on the real puzzle input.
     """
     data = aocd.get_data(year=2018, day=10)
 
-    points = dataframe_from_input(data)
-    part2 = find_message_second(points)
-    part1 = print_message(points, part2)
+    points = array_from_input(data)
+    part2 = converge_second(points)
+    part1 = render_message(points, part2)
     print(f"Part 1: \n{part1}")
     print(f"Part 2: {part2}")
 
@@ -4,9 +4,12 @@ https://adventofcode.com/2018/day/15
 """
 
 import math
+from array import array
 from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from itertools import chain, count
-from typing import Dict, Iterable, Optional, Set, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 import aocd  # type: ignore
 
 Combatant = namedtuple("Combatant", "position team hp attack")
@@ -202,7 +205,11 @@ def battle(
     walls: Set[complex],
     units: Iterable[Combatant],
     end_on_first_elf_death: bool = False,
+    grid: bool = True,
 ) -> Tuple[int, Iterable[Combatant]]:
+    if grid:
+        return Arena(walls, units).fight(end_on_first_elf_death)
+
     rounds = 0
     if end_on_first_elf_death:
         elves_needed = sum(1 for unit in units if unit.team == "elf")
@@ -218,7 +225,230 @@ def battle(
     return (rounds, units)
 
 
+class Arena:
+    """
+    A battle played out on a flat grid of integer cell indices (y * width + x, so that index order
+    is reading order), with each unit's details held in mutable slots and a reusable buffer for
+    the breadth-first searches.
+    """
+
+    def __init__(
+        self,
+        walls: Set[complex],
+        units: Iterable[Combatant],
+        elf_attack: Optional[int] = None,
+    ):
+        units = list(units)
+        self.width = int(max(wall.real for wall in walls)) + 1
+        height = int(max(wall.imag for wall in walls)) + 1
+        self.open = bytearray(self.width * height)
+        for y_coord in range(height):
+            for x_coord in range(self.width):
+                if complex(x_coord, y_coord) not in walls:
+                    self.open[y_coord * self.width + x_coord] = 1
+        self.steps = (-self.width, -1, 1, self.width)
+
+        self.position = [self.index(unit.position) for unit in units]
+        self.team = [0 if unit.team == "elf" else 1 for unit in units]
+        self.hp = [unit.hp for unit in units]
+        self.attack = [
+            elf_attack if elf_attack and unit.team == "elf" else unit.attack
+            for unit in units
+        ]
+        self.alive = [self.team.count(0), self.team.count(1)]
+        self.elf_died = False
+
+        self.occupant = array("i", [-1] * len(self.open))
+        for unit, pos in enumerate(self.position):
+            self.occupant[pos] = unit
+        self.distances = array("i", [-1] * len(self.open))
+        self.touched: List[int] = []
+
+    def index(self, position: complex) -> int:
+        return int(position.imag) * self.width + int(position.real)
+
+    def bfs(self, origin: int, stop: Callable[[int], bool]) -> Tuple[int, List[int]]:
+        """
+        Search outwards from the origin through open, unoccupied cells, returning the distance and
+        the cells at the nearest distance at which the stop condition holds (or -1 and no cells).
+        The distance buffer holds each reached cell's distance until the next search, which resets
+        only the cells touched by this one.
+        """
+        distances, occupant, cells, steps = (
+            self.distances,
+            self.occupant,
+            self.open,
+            self.steps,
+        )
+        for pos in self.touched:
+            distances[pos] = -1
+        self.touched.clear()
+
+        distances[origin] = 0
+        self.touched.append(origin)
+        frontier = [origin]
+        dist = 0
+        while frontier:
+            found = [pos for pos in frontier if stop(pos)]
+            if found:
+                return dist, found
+            dist += 1
+            following = []
+            for pos in frontier:
+                for step in steps:
+                    adj = pos + step
+                    if cells[adj] and occupant[adj] == -1 and distances[adj] == -1:
+                        distances[adj] = dist
+                        following.append(adj)
+            self.touched.extend(following)
+            frontier = following
+        return -1, []
+
+    def enemy_adjacent(self, pos: int, team: int) -> bool:
+        for step in self.steps:
+            other = self.occupant[pos + step]
+            if other != -1 and self.team[other] != team:
+                return True
+        return False
+
+    def move(self, unit: int) -> None:
+        pos, team = self.position[unit], self.team[unit]
+        dist, in_range = self.bfs(pos, lambda cell: self.enemy_adjacent(cell, team))
+        if dist <= 0:
+            return
+
+        target = min(in_range)
+        beside = {pos + step for step in self.steps}
+        self.bfs(target, lambda cell: cell in beside)
+        step_to = min(
+            (self.distances[pos + step], pos + step)
+            for step in self.steps
+            if self.distances[pos + step] != -1
+        )[1]
+
+        self.occupant[pos] = -1
+        self.occupant[step_to] = unit
+        self.position[unit] = step_to
+
+    def strike(self, unit: int) -> None:
+        pos, team = self.position[unit], self.team[unit]
+        victim = -1
+        for step in self.steps:
+            other = self.occupant[pos + step]
+            if other != -1 and self.team[other] != team:
+                if victim == -1 or self.hp[other] < self.hp[victim]:
+                    victim = other
+        if victim == -1:
+            return
+
+        self.hp[victim] -= self.attack[unit]
+        if self.hp[victim] <= 0:
+            self.hp[victim] = 0
+            self.occupant[self.position[victim]] = -1
+            self.alive[self.team[victim]] -= 1
+            if self.team[victim] == 0:
+                self.elf_died = True
+
+    def play_round(self, stop_on_elf_death: bool = False) -> bool:
+        """
+        Play a single round, returning whether it was completed (i.e. no unit found itself without
+        any enemies left to fight, and no elf died if we are stopping on an elf death).
+        """
+        for unit in sorted(range(len(self.hp)), key=self.position.__getitem__):
+            if self.hp[unit] <= 0:
+                continue
+            if self.alive[1 - self.team[unit]] == 0:
+                return False
+            if not self.enemy_adjacent(self.position[unit], self.team[unit]):
+                self.move(unit)
+            self.strike(unit)
+            if stop_on_elf_death and self.elf_died:
+                return False
+        return True
+
+    def fight(self, stop_on_elf_death: bool = False) -> Tuple[int, Set[Combatant]]:
+        rounds = 0
+        while self.play_round(stop_on_elf_death):
+            rounds += 1
+        return rounds, self.survivors()
+
+    def survivors(self) -> Set[Combatant]:
+        return {
+            Combatant(
+                position=complex(pos % self.width, pos // self.width),
+                team="elf" if team == 0 else "goblin",
+                hp=hp,
+                attack=attack,
+            )
+            for pos, team, hp, attack in zip(
+                self.position, self.team, self.hp, self.attack
+            )
+            if hp > 0
+        }
+
+
+def perfect_battle_attempt(
+    walls: Set[complex], units: Combatants, power: int
+) -> Optional[Tuple[int, Set[Combatant]]]:
+    """
+    Fight the battle with the elves at the given attack power, stopping as soon as an elf dies.
+    Return the result if the elves won without losses, otherwise None.
+    """
+    arena = Arena(walls, units, power)
+    result = arena.fight(stop_on_elf_death=True)
+    return None if arena.elf_died else result
+
+
 def find_perfect_battle(
+    walls: Set[complex],
+    units: Iterable[Combatant],
+    grid: bool = True,
+    processes: int = 1,
+) -> Tuple[int, Iterable[Combatant]]:
+    """
+    Find the battle in which the elves have the lowest attack power that lets them win without
+    losing a single elf.
+
+    With the grid engine, attack powers are searched by doubling until the elves win and then
+    bisecting, checking up to the given number of powers at a time in a process pool.
+    """
+    if not grid:
+        return find_perfect_battle_by_count(walls, units)
+
+    units = tuple(units)
+    attempt = partial(perfect_battle_attempt, walls, units)
+    pool = ProcessPoolExecutor(processes) if processes > 1 else None
+    run = pool.map if pool else map
+
+    failed = 3
+    best: Optional[Tuple[int, Tuple[int, Set[Combatant]]]] = None
+    try:
+        while best is None or best[0] - failed > 1:
+            if best is None:
+                powers = [failed * 2 ** (n + 1) for n in range(processes)]
+            else:
+                gap = best[0] - failed
+                quantity = min(processes, gap - 1)
+                powers = sorted(
+                    {
+                        failed + (gap * (n + 1)) // (quantity + 1)
+                        for n in range(quantity)
+                    }
+                )
+            for power, result in zip(powers, run(attempt, powers)):
+                if result is None:
+                    if best is None or power < best[0]:
+                        failed = max(failed, power)
+                elif best is None or power < best[0]:
+                    best = (power, result)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return best[1]
+
+
+def find_perfect_battle_by_count(
     walls: Set[complex], units: Iterable[Combatant]
 ) -> Tuple[int, Iterable[Combatant]]:
     elves = {unit for unit in units if unit.team == "elf"}
@@ -236,6 +466,91 @@ def find_perfect_battle(
     return (-1, set())
 
 
+EXAMPLES = (
+    (
+        "#######",
+        "#.G...#",
+        "#...EG#",
+        "#.#.#G#",
+        "#..G#E#",
+        "#.....#",
+        "#######",
+    ),
+    (
+        "#######",
+        "#G..#E#",
+        "#E#E.E#",
+        "#G.##.#",
+        "#...#E#",
+        "#...E.#",
+        "#######",
+    ),
+    (
+        "#######",
+        "#E..EG#",
+        "#.#G.E#",
+        "#E.##E#",
+        "#G..#.#",
+        "#..E#.#",
+        "#######",
+    ),
+    (
+        "#######",
+        "#E.G#.#",
+        "#.#G..#",
+        "#G.#.G#",
+        "#G..#.#",
+        "#...E.#",
+        "#######",
+    ),
+    (
+        "#######",
+        "#.E...#",
+        "#.#..G#",
+        "#.###.#",
+        "#E#G#G#",
+        "#...#G#",
+        "#######",
+    ),
+    (
+        "#########",
+        "#G......#",
+        "#.E.#...#",
+        "#..##..G#",
+        "#...##..#",
+        "#...#...#",
+        "#.G...G.#",
+        "#.....G.#",
+        "#########",
+    ),
+)
+
+
+def test_part1() -> None:
+    """
+    Examples for Part 1.
+    """
+    expected = ((47, 590), (37, 982), (46, 859), (35, 793), (54, 536), (20, 937))
+    for example, result in zip(EXAMPLES, expected):
+        text = "\n".join(example)
+        for grid in (False, True):
+            rounds, units = battle(read_walls(text), read_units(text), grid=grid)
+            assert outcome(rounds, units) == result
+
+
+def test_part2() -> None:
+    """
+    Examples for Part 2 (the second example is not given one in the puzzle).
+    """
+    expected = ((29, 172), (33, 948), (37, 94), (39, 166), (30, 38))
+    for example, result in zip(EXAMPLES[:1] + EXAMPLES[2:], expected):
+        text = "\n".join(example)
+        walls, units = read_walls(text), read_units(text)
+        for grid in (False, True):
+            assert outcome(*find_perfect_battle(walls, units, grid)) == result
+        assert outcome(*find_perfect_battle(walls, units, processes=2)) == result
+
+
 def main() -> None:
     """
     Calculate and output the solutions based on the real puzzle input.
@@ -3,12 +3,15 @@
 https://adventofcode.com/2018/day/24
 """
 
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
+from functools import partial
 from itertools import count
 from typing import Dict, List, Optional, Set, Tuple
 import re
 import aocd  # type: ignore
+import numpy as np
 
 
 class Team(Enum):
@@ -177,7 +180,160 @@ def boost(groups: List[Group], amount: int) -> List[Group]:
     ]
 
 
-def smallest_boosted_win(groups: List[Group]) -> int:
+class Army:
+    """
+    All the groups of both sides held as parallel arrays (structure of arrays), with damage types
+    as bits so weaknesses and immunities are bitmasks. The starting state is kept unchanged so that
+    battles with different boosts can be fought from it over and over.
+    """
+
+    def __init__(self, groups: List[Group]) -> None:
+        kinds = {group.attack.type for group in groups}
+        for group in groups:
+            kinds |= group.weaknesses | group.immunities
+        bits = {kind: 1 << bit for bit, kind in enumerate(sorted(kinds))}
+
+        def mask(kinds: Set[str]) -> int:
+            return sum(bits[kind] for kind in kinds)
+
+        self.team = np.array([group.team.value for group in groups])
+        self.units = np.array([group.units for group in groups], dtype=np.int64)
+        self.hit_points = np.array([group.hit_points for group in groups])
+        self.damage = np.array([group.attack.damage for group in groups])
+        self.initiative = np.array([group.attack.initiative for group in groups])
+        self.attack_type = np.array([bits[group.attack.type] for group in groups])
+        self.weaknesses = np.array([mask(group.weaknesses) for group in groups])
+        self.immunities = np.array([mask(group.immunities) for group in groups])
+
+        # multiplier[attacker, defender] is 0 for allies and immune defenders, else 1 or 2
+        attack_type = self.attack_type[:, None]
+        self.multiplier = np.where(
+            (self.immunities & attack_type) != 0,
+            0,
+            np.where((self.weaknesses & attack_type) != 0, 2, 1),
+        ) * (self.team[:, None] != self.team)
+        self.attack_order = np.argsort(-self.initiative).tolist()
+
+    def select_targets(self, units: np.ndarray, damage: np.ndarray) -> List[int]:
+        """
+        Choose the defender for each group (-1 for none), from the matrix of damage every group
+        would deal to every other this round.
+        """
+        power = units * damage
+        alive = units > 0
+        dealt = power[:, None] * self.multiplier * alive
+        targets = [-1] * len(units)
+        available = alive.copy()
+
+        for attacker in np.lexsort((-self.initiative, -power)).tolist():
+            if not alive[attacker]:
+                continue
+            row = np.where(available, dealt[attacker], 0)
+            most = row.max()
+            if most <= 0:
+                continue
+            candidates = np.flatnonzero(row == most)
+            defender = candidates[
+                np.lexsort((self.initiative[candidates], power[candidates]))[-1]
+            ]
+            targets[attacker] = int(defender)
+            available[defender] = False
+
+        return targets
+
+    def battle(self, amount: int = 0) -> Tuple[Optional[Team], int]:
+        """
+        Fight an entire battle with the immune system boosted by the given amount, until only one
+        side survives or a round passes in which no units are killed (a stalemate). Return the
+        winner (None for a stalemate) and the total units left.
+        """
+        units = self.units.copy()
+        damage = self.damage + amount * (self.team == Team.IMMUNE.value)
+        hit_points = self.hit_points.tolist()
+        multiplier = self.multiplier.tolist()
+
+        while True:
+            teams = set(self.team[units > 0].tolist())
+            if len(teams) == 0:
+                return (None, 0)
+            if len(teams) == 1:
+                return (Team(teams.pop()), int(units.sum()))
+
+            targets = self.select_targets(units, damage)
+            killed = 0
+            for attacker in self.attack_order:
+                defender = targets[attacker]
+                if defender < 0 or units[attacker] <= 0:
+                    continue
+                dealt = int(units[attacker] * damage[attacker])
+                dealt *= multiplier[attacker][defender]
+                lost = min(dealt // hit_points[defender], int(units[defender]))
+                units[defender] -= lost
+                killed += lost
+
+            if killed == 0:
+                return (None, int(units.sum()))
+
+
+def boosted_battle(army: Army, amount: int) -> Tuple[Optional[Team], int]:
+    return army.battle(amount)
+
+
+def smallest_boosted_win(
+    groups: List[Group], bisect: bool = True, processes: int = 1
+) -> int:
+    """
+    Find the number of immune system units left after the battle with the smallest boost that lets
+    the immune system win.
+
+    With bisection, battles are fought from a single Army: boosts are doubled until the immune
+    system wins, then the gap between the largest boost that didn't win (either side winning or a
+    stalemate) and the smallest that did is split, up to the given number of boosts at a time in a
+    process pool. This assumes that once a boost wins, every larger one does too.
+    """
+    if not bisect:
+        return smallest_boosted_win_by_count(groups)
+
+    attempt = partial(boosted_battle, Army(groups))
+    pool = ProcessPoolExecutor(processes) if processes > 1 else None
+    run = pool.map if pool else map
+
+    # past this boost any immune group that can hurt a defender wipes it out in one attack
+    overwhelming = max(group.units * group.hit_points for group in groups)
+
+    failed, probe = 0, 1
+    best: Optional[Tuple[int, int]] = None
+    try:
+        while best is None or best[0] - failed > 1:
+            if best is None:
+                if failed > overwhelming:
+                    raise ValueError("The immune system cannot win with any boost")
+                amounts = [probe << n for n in range(processes)]
+                probe <<= processes
+            else:
+                gap = best[0] - failed
+                quantity = min(processes, gap - 1)
+                amounts = sorted(
+                    {
+                        failed + (gap * (n + 1)) // (quantity + 1)
+                        for n in range(quantity)
+                    }
+                )
+            for amount, (winner, survivors) in zip(amounts, run(attempt, amounts)):
+                if best is not None and amount >= best[0]:
+                    continue
+                if winner == Team.IMMUNE:
+                    best = (amount, survivors)
+                else:
+                    failed = max(failed, amount)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return best[1]
+
+
+def smallest_boosted_win_by_count(groups: List[Group]) -> int:
     for amount in count(1):
         boosted_groups = boost(groups, amount)
         winner, survivors = battle(boosted_groups)
@@ -392,6 +548,12 @@ def test_part2() -> None:
     ]
     assert boost(ex1, 1570) == ex2
     assert battle(ex2) == (Team.IMMUNE, 51)
+    army = Army(boost(ex1, 0))
+    assert army.battle() == (Team.INFECTION, 5216)
+    assert army.battle(1569) == (Team.INFECTION, 139)
+    assert army.battle(1570) == (Team.IMMUNE, 51)
+    assert smallest_boosted_win(ex1) == 51
+    assert smallest_boosted_win(ex1, processes=2) == 51
 
 
 def main() -> None:
@@ -401,7 +563,8 @@ def main() -> None:
     data = aocd.get_data(year=2018, day=24)
     groups = Group.all_from_description(data)
 
-    _, part1 = battle(boost(groups, 0))
+    army = Army(groups)
+    _, part1 = army.battle()
     print(f"Part 1: {part1}")
 
     print(f"Part 2: {smallest_boosted_win(groups)}")
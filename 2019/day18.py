@@ -9,7 +9,9 @@ from functools import reduce
 from heapq import heappop, heappush
 from operator import or_
 from string import ascii_lowercase, ascii_uppercase
-from typing import Dict, Iterator, List, Set, Tuple
+from time import perf_counter
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
+import random
 import aocd  # type: ignore
 
 
@@ -92,93 +94,158 @@ class Maze:
         key_locations = {loc: k for k, loc in self.keys.items()}
 
         graph: Dict[int, Dict[int, Connection]] = {}
-        floodfill: deque[Tuple[int, complex, Set[complex], int, int]] = deque()
-
-        for key, pos in self.keys.items():
-            graph[key] = {}
-            floodfill.append((key, pos, set(self.walls), 0, 0))
-        for robot, pos in self.robots.items():
-            graph[robot] = {}
-            floodfill.append((robot, pos, set(self.walls), 0, 0))
-
-        while floodfill:
-            start, pos, visited, keyring, steps = floodfill.popleft()
-            visited.add(pos)
-
-            key_here = key_locations.get(pos)
-            if key_here and key_here != start:
-                graph[start][key_here] = Connection(steps, keyring)
-                keyring |= key_here
-            if door_here := door_locations.get(pos):
-                keyring |= door_here
-
-            for newpos in neighbours(pos):
-                if newpos not in visited:
-                    floodfill.append((start, newpos, visited, keyring, steps + 1))
 
-        return graph
+        for start, origin in (*self.keys.items(), *self.robots.items()):
+            graph[start] = {}
+            visited = {origin}
+            floodfill: deque[Tuple[complex, int, int]] = deque([(origin, 0, 0)])
 
+            while floodfill:
+                pos, keyring, steps = floodfill.popleft()
 
-@dataclass(frozen=True, order=True)
-class GraphPathSearchState:
-    """
-    A single state in our search of paths through a graph.
-    """
+                key_here = key_locations.get(pos)
+                if key_here and key_here != start:
+                    graph[start][key_here] = Connection(steps, keyring)
+                    keyring |= key_here
+                if door_here := door_locations.get(pos):
+                    keyring |= door_here
 
-    dist: int
-    keyring: int
-    positions: Tuple[int, ...]
+                for newpos in neighbours(pos):
+                    if newpos not in visited and newpos not in self.walls:
+                        visited.add(newpos)
+                        floodfill.append((newpos, keyring, steps + 1))
 
-    def reachable_locations(
-        self, graph: Dict[int, Dict[int, Connection]], pos: int
-    ) -> Dict[int, int]:
-        """
-        Yield the set of reachable locations in the given graph, from a specific
-        location and with the current keyring.
-        """
-        return {
-            newpos: connection.dist
-            for newpos, connection in graph[pos].items()
-            if newpos & self.keyring == 0
-            and connection.keys & self.keyring == connection.keys
-        }
-
-    def reachable_states(
-        self, graph: Dict[int, Dict[int, Connection]]
-    ) -> Iterator["GraphPathSearchState"]:
-        """
-        Yield all reachable states from this current state.
-        """
-        for robot, pos in enumerate(self.positions):
-            for newpos, dist in self.reachable_locations(graph, pos).items():
-                positions = tuple(
-                    newpos if p == robot else pos
-                    for p, pos in enumerate(self.positions)
-                )
-                yield self.__class__(self.dist + dist, self.keyring | newpos, positions)
+        return graph
 
 
 def shortest_path(graph: Dict[int, Dict[int, Connection]]) -> int:
     """
     Given a connection graph for a maze, calculate the shortest possible route.
+
+    This is a Dijkstra search over (positions, keyring) states, keeping the best known distance to
+    each state so that none is expanded more than once.
     """
     starts = tuple(node for node in graph if node <= 0)
     full_keyring = reduce(or_, (node for node in graph if node > 0))
-    visited = set()
-    consider: List[GraphPathSearchState] = [GraphPathSearchState(0, 0, starts)]
+    best: Dict[Tuple[Tuple[int, ...], int], int] = {(starts, 0): 0}
+    consider: List[Tuple[int, int, Tuple[int, ...]]] = [(0, 0, starts)]
 
     while consider:
-        state = heappop(consider)
-        if state.keyring & full_keyring == full_keyring:
-            return state.dist
-        for reachable in state.reachable_states(graph):
-            if reachable not in visited:
-                heappush(consider, reachable)
-                visited.add(reachable)
+        dist, keyring, positions = heappop(consider)
+        if keyring == full_keyring:
+            return dist
+        if best[(positions, keyring)] < dist:
+            continue
+
+        for robot, pos in enumerate(positions):
+            for newpos, connection in graph[pos].items():
+                if newpos & keyring or connection.keys & keyring != connection.keys:
+                    continue
+                state = (
+                    positions[:robot] + (newpos,) + positions[robot + 1 :],
+                    keyring | newpos,
+                )
+                new_dist = dist + connection.dist
+                if new_dist < best.get(state, new_dist + 1):
+                    best[state] = new_dist
+                    heappush(consider, (new_dist, state[1], state[0]))
 
     return -1
 
 
+def generate_maze(cells: int, key_count: int, seed: int = 0) -> str:
+    """
+    Generate the text of a random solvable maze, in the puzzle input format. Each quadrant is a
+    perfect maze of cells x cells, and the quadrants are joined through the start, so the same text
+    can be read with one robot or with four. Doors are only placed where they block the route to
+    keys which come after their own key in a random order.
+    """
+    rng = random.Random(seed)
+    size = 4 * cells + 1
+    centre = 2 * cells
+    grid = [["#"] * size for _ in range(size)]
+
+    for left, top in ((0, 0), (centre, 0), (0, centre), (centre, centre)):
+        start = (left + 1, top + 1)
+        grid[start[1]][start[0]] = "."
+        stack = [start]
+        while stack:
+            x_coord, y_coord = stack[-1]
+            options = [
+                (x_coord + dx, y_coord + dy)
+                for dx, dy in ((0, -2), (2, 0), (0, 2), (-2, 0))
+                if left < x_coord + dx < left + centre
+                and top < y_coord + dy < top + centre
+                and grid[y_coord + dy][x_coord + dx] == "#"
+            ]
+            if not options:
+                stack.pop()
+                continue
+            new_x, new_y = rng.choice(options)
+            grid[(y_coord + new_y) // 2][(x_coord + new_x) // 2] = "."
+            grid[new_y][new_x] = "."
+            stack.append((new_x, new_y))
+
+    grid[centre][centre] = "@"
+    grid[centre - 1][centre] = grid[centre + 1][centre] = "."
+
+    parents: Dict[Tuple[int, int], Tuple[int, int]] = {
+        (centre, centre): (centre, centre)
+    }
+    order = [(centre, centre)]
+    for x_coord, y_coord in order:
+        for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)):
+            newpos = (x_coord + dx, y_coord + dy)
+            if grid[newpos[1]][newpos[0]] != "#" and newpos not in parents:
+                parents[newpos] = (x_coord, y_coord)
+                order.append(newpos)
+
+    near_start = {(centre + dx, centre + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)}
+    spaces = [pos for pos in order if pos not in near_start]
+    key_positions = rng.sample(spaces, min(key_count, len(spaces)))
+    for number, (x_coord, y_coord) in enumerate(key_positions):
+        grid[y_coord][x_coord] = ascii_lowercase[number]
+
+    # the earliest key (in the random order) found beyond each space, working back from the leaves
+    earliest = {pos: len(key_positions) for pos in order}
+    for number, pos in enumerate(key_positions):
+        earliest[pos] = number
+    for pos in reversed(order[1:]):
+        earliest[parents[pos]] = min(earliest[parents[pos]], earliest[pos])
+
+    free = [pos for pos in spaces if pos not in key_positions]
+    for number in range(len(key_positions)):
+        options = [pos for pos in free if earliest[pos] > number]
+        if options:
+            x_coord, y_coord = pos = rng.choice(options)
+            grid[y_coord][x_coord] = ascii_uppercase[number]
+            free.remove(pos)
+
+    return "\n".join("".join(row) for row in grid)
+
+
+def benchmark(
+    sizes: Sequence[int] = (5, 10, 20, 40), key_counts: Sequence[int] = (4, 8, 12, 16)
+) -> None:
+    """
+    Time building the graph and solving both parts on generated mazes of increasing size and
+    numbers of keys.
+    """
+    for cells in sizes:
+        for key_count in key_counts:
+            text = generate_maze(cells, key_count)
+            for multi_bots in (False, True):
+                begin = perf_counter()
+                graph = Maze.from_text(text, multi_bots).to_graph()
+                built = perf_counter() - begin
+                dist = shortest_path(graph)
+                solved = perf_counter() - begin - built
+                print(
+                    f"{cells:>3} cells, {key_count:>2} keys, {4 if multi_bots else 1} robots: "
+                    f"{dist} steps (graph {built:.3f}s, search {solved:.3f}s)"
+                )
+
+
 def test_part1() -> None:
     """
     Examples for Part 1.
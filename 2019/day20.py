@@ -5,8 +5,12 @@ https://adventofcode.com/2019/day/20
 
 from collections import deque
 from dataclasses import dataclass
+from functools import cached_property
+from heapq import heappop, heappush
+from math import inf
 from string import ascii_uppercase
-from typing import Dict, Iterator, List, Sequence, Set, Tuple
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
 import aocd  # type: ignore
 
 
@@ -104,16 +108,58 @@ class Maze:
             labels["ZZ"][0],
         )
 
+    @cached_property
+    def jumps(self) -> Dict[complex, Tuple[complex, int]]:
+        """
+        Map each end of each portal to the position it leads to, and the change in level (in the
+        recursive mazes) from passing through it.
+        """
+        jumps: Dict[complex, Tuple[complex, int]] = {}
+        for portal in self.portals:
+            jumps[portal.inner] = (portal.outer, 1)
+            jumps[portal.outer] = (portal.inner, -1)
+        return jumps
+
+    @cached_property
+    def portal_graph(self) -> Dict[complex, Dict[complex, int]]:
+        """
+        Compress the maze into a weighted graph between its points of interest (the start, finish
+        and portal ends), giving the walking distance between each pair which are connected
+        without passing through a portal.
+        """
+        interesting = set(self.jumps) | {self.start, self.finish}
+        graph: Dict[complex, Dict[complex, int]] = {}
+
+        for origin in interesting:
+            distances: Dict[complex, int] = {}
+            visited = {origin}
+            consider = deque([(origin, 0)])
+            while consider:
+                pos, dist = consider.popleft()
+                if pos in interesting and pos != origin:
+                    distances[pos] = dist
+                for direction in COMPASS:
+                    neighbour = pos + direction
+                    if neighbour in self.spaces and neighbour not in visited:
+                        visited.add(neighbour)
+                        consider.append((neighbour, dist + 1))
+            graph[origin] = distances
+
+        return graph
+
     def neighbours(self, position: complex) -> Set[complex]:
         """
         Yield the neighbours of the given position, including those accessible via
         portals.
         """
-        neighbours = {position + direction for direction in COMPASS}
-        inner = {portal.outer for portal in self.portals if portal.inner == position}
-        outer = {portal.inner for portal in self.portals if portal.outer == position}
-
-        return (neighbours | outer | inner).intersection(self.spaces)
+        neighbours = {
+            position + direction
+            for direction in COMPASS
+            if position + direction in self.spaces
+        }
+        if position in self.jumps:
+            neighbours.add(self.jumps[position][0])
+        return neighbours
 
     def neighbours_recursive(
         self, level: int, position: complex
@@ -122,59 +168,113 @@ class Maze:
         Yield the neighbours of the given position, including those accessible via
         portals, in the recursive, nested set of mazes.
         """
-        neighbours = {(level, position + direction) for direction in COMPASS}
-        inner = {
-            (level + 1, portal.outer)
-            for portal in self.portals
-            if portal.inner == position
-        }
-        outer = {
-            (level - 1, portal.inner)
-            for portal in self.portals
-            if portal.outer == position and level > 0
-        }
-
-        return {
-            (level, position)
-            for (level, position) in neighbours | outer | inner
-            if position in self.spaces
+        neighbours = {
+            (level, position + direction)
+            for direction in COMPASS
+            if position + direction in self.spaces
         }
+        if position in self.jumps:
+            destination, change = self.jumps[position]
+            if level + change >= 0:
+                neighbours.add((level + change, destination))
+        return neighbours
 
     def shortest_path(self) -> int:
         """
         Calculate the shortest path through the maze.
         """
         consider = deque([(self.start, 0)])
-        visited: Set[complex] = set()
+        visited = {self.start}
 
         while consider:
             pos, dist = consider.popleft()
             if pos == self.finish:
                 return dist
-            visited.add(pos)
             for neighbour in self.neighbours(pos):
                 if neighbour not in visited:
+                    visited.add(neighbour)
                     consider.append((neighbour, dist + 1))
 
         return -1
 
-    def shortest_path_recursive(self) -> int:
+    def search_recursive(
+        self, max_depth: Optional[int] = None, compressed: bool = True
+    ) -> Tuple[int, int]:
         """
-        Calculate the shortest path through the recursive, nested set of mazes.
+        Search for the shortest path through the recursive, nested set of mazes, never going deeper
+        than the given maximum depth (if any). Return the length of the path (or -1 if there is
+        none) and the number of nodes expanded during the search.
+
+        The compressed search runs Dijkstra's algorithm over (level, portal end) pairs using the
+        portal graph; otherwise a breadth-first search is made over every space on every level.
         """
-        consider = deque([(0, self.start, 0)])
-        visited: Set[Tuple[int, complex]] = set()
+        depth_limit = inf if max_depth is None else max_depth
+        expanded = 0
 
-        while consider:
-            level, pos, dist = consider.popleft()
+        if not compressed:
+            consider = deque([(0, self.start, 0)])
+            visited = {(0, self.start)}
+            while consider:
+                level, pos, dist = consider.popleft()
+                expanded += 1
+                if pos == self.finish and level == 0:
+                    return dist, expanded
+                for neighbour in self.neighbours_recursive(level, pos):
+                    if neighbour not in visited and neighbour[0] <= depth_limit:
+                        visited.add(neighbour)
+                        consider.append(neighbour + (dist + 1,))
+            return -1, expanded
+
+        graph = self.portal_graph
+        best: Dict[Tuple[int, complex], int] = {(0, self.start): 0}
+        heap: List[Tuple[int, int, float, float]] = [
+            (0, 0, self.start.real, self.start.imag)
+        ]
+        while heap:
+            dist, level, x_coord, y_coord = heappop(heap)
+            pos = complex(x_coord, y_coord)
+            if best.get((level, pos), dist) < dist:
+                continue
+            expanded += 1
             if pos == self.finish and level == 0:
-                return dist
-            visited.add((level, pos))
-            for neighbour in self.neighbours_recursive(level, pos):
-                if neighbour not in visited:
-                    consider.append(neighbour + (dist + 1,))
+                return dist, expanded
 
-        return -1
+            moves = [(level, other, steps) for other, steps in graph[pos].items()]
+            if pos in self.jumps:
+                destination, change = self.jumps[pos]
+                moves.append((level + change, destination, 1))
+
+            for new_level, new_pos, steps in moves:
+                if not 0 <= new_level <= depth_limit:
+                    continue
+                new_dist = dist + steps
+                if new_dist < best.get((new_level, new_pos), new_dist + 1):
+                    best[(new_level, new_pos)] = new_dist
+                    heappush(heap, (new_dist, new_level, new_pos.real, new_pos.imag))
+
+        return -1, expanded
+
+    def shortest_path_recursive(
+        self, max_depth: Optional[int] = None, compressed: bool = True
+    ) -> int:
+        """
+        Calculate the shortest path through the recursive, nested set of mazes.
+        """
+        return self.search_recursive(max_depth, compressed)[0]
+
+    def benchmark(self, max_depth: Optional[int] = None) -> None:
+        """
+        Report the nodes expanded per second by each recursive search method.
+        """
+        for compressed in (False, True):
+            begin = perf_counter()
+            dist, expanded = self.search_recursive(max_depth, compressed)
+            elapsed = perf_counter() - begin
+            name = "compressed" if compressed else "full grid"
+            print(
+                f"{name}: {dist} steps, {expanded} nodes in {elapsed:.3f}s "
+                f"({expanded / elapsed:,.0f} nodes/s)"
+            )
 
 
 EXAMPLES = (
@@ -1055,8 +1155,10 @@ def test_part2() -> None:
     """
     Examples for Part 2.
     """
-    assert EXAMPLES[0].shortest_path_recursive() == 26
-    assert EXAMPLES[2].shortest_path_recursive() == 396
+    for compressed in (False, True):
+        assert EXAMPLES[0].shortest_path_recursive(compressed=compressed) == 26
+        assert EXAMPLES[2].shortest_path_recursive(compressed=compressed) == 396
+        assert EXAMPLES[2].shortest_path_recursive(5, compressed) == -1
 
 
 def main() -> None:
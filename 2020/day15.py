@@ -3,32 +3,98 @@
 https://adventofcode.com/2020/day/15
 """
 
+from array import array
 from collections import deque
-from typing import Dict, Iterable, Optional
+from typing import Callable, Dict, Iterable, Optional
+import pickle
 import aocd  # type: ignore
+import pytest
 
 
 class ElfMemoryGame:
-    def __init__(self, starting_numbers: Iterable[int]):
+    """
+    The elves' memory game. By default the last two appearances of each number are kept in a
+    dictionary; if a capacity is given, only the turn on which each number was last seen is kept,
+    in a preallocated array indexed by number (0 meaning not yet seen).
+    """
+
+    def __init__(self, starting_numbers: Iterable[int], capacity: Optional[int] = None):
         self.appearances: Dict[int, deque[int]] = {}
+        self.last_seen: Optional[array] = None
+        self.latest: int
         self.length = 0
-        for number in starting_numbers:
+        numbers = list(starting_numbers)
+        if capacity is not None:
+            self.last_seen = array("i")
+            self.reserve(max([capacity, *(number + 1 for number in numbers)]))
+        for number in numbers:
             self.add(number)
 
     def __len__(self) -> int:
         return self.length
 
+    def reserve(self, capacity: int) -> None:
+        if self.last_seen is not None and len(self.last_seen) < capacity:
+            extra = capacity - len(self.last_seen)
+            self.last_seen.frombytes(bytes(extra * self.last_seen.itemsize))
+
     def next_number(self, previous: Optional[int] = None) -> int:
         previous = previous or self.latest
+        if self.last_seen is not None:
+            if previous != self.latest:
+                raise ValueError(
+                    "Only the latest number's gap is known when a capacity is given"
+                )
+            seen = self.last_seen[previous]
+            return self.length - seen if seen else 0
         appeared = self.appearances[previous]
         return abs(appeared[1] - appeared[0])
 
-    def extend(self, length: int) -> None:
+    def extend(
+        self,
+        length: int,
+        checkpoint: Optional[Callable[["ElfMemoryGame"], None]] = None,
+        every: int = 1_000_000,
+    ) -> None:
+        """
+        Play on until the game reaches the given length. If a checkpoint callback is given, it is
+        called with the game every so many turns (and at the end), so that progress can be
+        reported or the game saved and later resumed.
+        """
         while self.length < length:
-            self.add(self.next_number())
+            stop = (
+                min(length, (self.length // every + 1) * every)
+                if checkpoint
+                else length
+            )
+            if self.last_seen is not None:
+                self.reserve(stop)
+                self._play_array(stop)
+            else:
+                while self.length < stop:
+                    self.add(self.next_number())
+            if checkpoint:
+                checkpoint(self)
+
+    def _play_array(self, length: int) -> None:
+        seen = self.last_seen
+        assert seen is not None
+        turn = self.length
+        latest = self.latest
+        while turn < length:
+            previous = seen[latest]
+            seen[latest] = turn
+            latest = turn - previous if previous else 0
+            turn += 1
+        self.length = turn
+        self.latest = latest
 
     def add(self, number: int) -> None:
-        if number in self.appearances:
+        if self.last_seen is not None:
+            self.reserve(number + 1)
+            if self.length:
+                self.last_seen[self.latest] = self.length
+        elif number in self.appearances:
             self.appearances[number].append(self.length)
         else:
             self.appearances[number] = deque([self.length, self.length], maxlen=2)
@@ -36,13 +102,64 @@ class ElfMemoryGame:
         self.latest = number
 
 
+def test_part1() -> None:
+    """
+    Examples for Part 1.
+    """
+    examples = [
+        ("0,3,6", 436),
+        ("1,3,2", 1),
+        ("2,1,3", 10),
+        ("1,2,3", 27),
+        ("2,3,1", 78),
+        ("3,2,1", 438),
+        ("3,1,2", 1836),
+    ]
+    for capacity in (None, 2020):
+        for starting, expected in examples:
+            emg = ElfMemoryGame(map(int, starting.split(",")), capacity)
+            emg.extend(2020)
+            assert emg.latest == expected
+
+
+def test_next_number() -> None:
+    """
+    The gap before an earlier number is only available without a capacity.
+    """
+    emg = ElfMemoryGame([0, 3, 6], None)
+    emg.extend(10)
+    assert emg.next_number(3) == 1
+    assert emg.next_number() == 2
+
+    emg = ElfMemoryGame([0, 3, 6], 100)
+    emg.extend(10)
+    assert emg.next_number() == 2
+    with pytest.raises(ValueError):
+        emg.next_number(3)
+
+
+def test_checkpoint_resume() -> None:
+    """
+    A game saved at a checkpoint can be resumed and reaches the same result.
+    """
+    saved = []
+    emg = ElfMemoryGame([0, 3, 6], 100)
+    emg.extend(60, lambda game: saved.append(pickle.dumps(game)), every=25)
+    assert len(saved) == 3
+
+    resumed = pickle.loads(saved[0])
+    assert len(resumed) == 25
+    resumed.extend(2020)
+    assert resumed.latest == 436
+
+
 def main() -> None:
     """
     Calculate and output the solutions based on the real puzzle input.
     """
     data = aocd.get_data(year=2020, day=15)
 
-    emg = ElfMemoryGame(map(int, data.split(",")))
+    emg = ElfMemoryGame(map(int, data.split(",")), capacity=30_000_000)
     emg.extend(2020)
     print(f"Part 1: {emg.latest}")
 
@@ -3,8 +3,9 @@
 https://adventofcode.com/2020/day/23
 """
 
+from array import array
 from math import prod
-from typing import Dict, List
+from typing import Dict, List, Union
 import aocd  # type: ignore
 
 
@@ -65,9 +66,12 @@ class Game:
 
     @property
     def cup_order(self) -> List[int]:
+        return self.cups_after_one(len(self.cups) - 1)
+
+    def cups_after_one(self, quantity: int) -> List[int]:
         order = []
         node = self.cups[1]
-        for _ in range(len(self.cups) - 1):
+        for _ in range(quantity):
             node = node.right
             order.append(node.identifier)
         return order
@@ -97,20 +101,104 @@ class Game:
         return self
 
 
-def main() -> None:
+class FlatGame:
+    """
+    The same game played on a flat array of cups, where the value at each index is the identifier
+    of the cup to the right of the cup with that identifier (index 0 is unused).
+    """
+
+    def __init__(self, successors: array, current: int):
+        self.successors = successors
+        self.current = current
+        self.highest = len(successors) - 1
+
+    def __repr__(self) -> str:
+        return f"FlatGame(cups=[{self.highest} cups], current={self.current})"
+
+    @classmethod
+    def from_puzzle_input(cls, text: str, million_cups: bool = False) -> "FlatGame":
+        cup_order = [int(digit) for digit in text]
+        highest = 1_000_000 if million_cups else max(cup_order)
+
+        successors = array("I", range(1, highest + 2))
+        for cup_id, right in zip(cup_order, cup_order[1:]):
+            successors[cup_id] = right
+        if highest > len(cup_order):
+            successors[cup_order[-1]] = len(cup_order) + 1
+            successors[highest] = cup_order[0]
+        else:
+            successors[cup_order[-1]] = cup_order[0]
+
+        return cls(successors, cup_order[0])
+
+    @property
+    def cup_order(self) -> List[int]:
+        return self.cups_after_one(self.highest - 1)
+
+    def cups_after_one(self, quantity: int) -> List[int]:
+        order = []
+        cup_id = 1
+        for _ in range(quantity):
+            cup_id = self.successors[cup_id]
+            order.append(cup_id)
+        return order
+
+    def play(self, moves: int) -> "FlatGame":
+        successors = self.successors
+        highest = self.highest
+        current = self.current
+        for _ in range(moves):
+            first = successors[current]
+            second = successors[first]
+            third = successors[second]
+            successors[current] = successors[third]
+
+            destination = current - 1 or highest
+            while destination in (first, second, third):
+                destination = destination - 1 or highest
+
+            successors[third] = successors[destination]
+            successors[destination] = first
+            current = successors[current]
+        self.current = current
+        return self
+
+
+def new_game(
+    text: str, million_cups: bool = False, flat: bool = True
+) -> Union[Game, FlatGame]:
+    """
+    Set up a game from the puzzle input, using either the flat array of cups (the default) or the
+    linked Cup objects.
+    """
+    if flat:
+        return FlatGame.from_puzzle_input(text, million_cups)
+    return Game.from_puzzle_input(text, million_cups)
+
+
+def test_part1() -> None:
+    """
+    Examples for Part 1.
+    """
+    for flat in (False, True):
+        for moves, expected in ((10, "92658374"), (100, "67384529")):
+            order = new_game("389125467", flat=flat).play(moves).cup_order
+            assert "".join(str(cup_id) for cup_id in order) == expected
+
+
+def main(flat: bool = True) -> None:
     """
     Calculate and output the solutions based on the real puzzle input.
     """
     data = aocd.get_data(year=2020, day=23)
 
-    order = Game.from_puzzle_input(data).play(100).cup_order
+    order = new_game(data, flat=flat).play(100).cup_order
     part1 = "".join(str(cup_id) for cup_id in order)
     print(f"Part 1: {part1}")
 
-    bigger_game = Game.from_puzzle_input(data, million_cups=True)
+    bigger_game = new_game(data, million_cups=True, flat=flat)
     bigger_game.play(10_000_000)
-    interesting_cups = (bigger_game.cups[1].right, bigger_game.cups[1].right.right)
-    part2 = prod(cup.identifier for cup in interesting_cups)
+    part2 = prod(bigger_game.cups_after_one(2))
     print(f"Part 2: {part2}")
 
 
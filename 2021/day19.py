@@ -4,7 +4,8 @@ https://adventofcode.com/2021/day/19
 """
 
 from itertools import combinations
-from typing import Dict, Iterable, List, Set, Tuple
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 import aocd  # type: ignore
 import numpy as np
 
@@ -25,8 +26,11 @@ FLIPS = {(x, y, z) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)}
 ROTATIONS = {(0, 1, 2), (0, 2, 1), (1, 0, 2), (1, 2, 0), (2, 0, 1), (2, 1, 0)}
 
 
+ORIENTATIONS = [(rotate, flip) for rotate in ROTATIONS for flip in FLIPS]
+
+
 def all_orientations(scanner: np.ndarray) -> List[np.ndarray]:
-    return [scanner[:, rotate] * flip for rotate in ROTATIONS for flip in FLIPS]
+    return [scanner[:, rotate] * flip for rotate, flip in ORIENTATIONS]
 
 
 def common_point_count(first: np.ndarray, second: np.ndarray) -> int:
@@ -74,18 +78,125 @@ def best_overlap(
     )
 
 
-def build_overlap_map(scanners: Dict[int, np.ndarray]) -> Dict[int, Set[int]]:
+def distance_matrix(scanner: np.ndarray) -> np.ndarray:
+    """
+    Squared distances between every pair of beacons seen by a scanner. These do not change however
+    the scanner is rotated or moved.
+    """
+    return np.asarray(((scanner[:, None] - scanner) ** 2).sum(-1))
+
+
+def fingerprint(scanner: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The distinct squared distances between pairs of beacons seen by a scanner, in order, along with
+    how many pairs of beacons are that far apart.
+    """
+    distances = distance_matrix(scanner)[np.triu_indices(len(scanner), 1)]
+    return np.unique(distances, return_counts=True)
+
+
+def shared_distances(
+    first: Tuple[np.ndarray, np.ndarray], second: Tuple[np.ndarray, np.ndarray]
+) -> int:
+    """
+    Count the distances two fingerprints have in common (including repeats).
+    """
+    (values1, counts1), (values2, counts2) = first, second
+    _, index1, index2 = np.intersect1d(
+        values1, values2, assume_unique=True, return_indices=True
+    )
+    return int(np.minimum(counts1[index1], counts2[index2]).sum())
+
+
+def matched_beacons(
+    first: np.ndarray, second: np.ndarray, threshold: int = 12
+) -> List[Tuple[int, int]]:
+    """
+    Pair up beacons that could be the same across two scanners. Each distance found between a pair
+    of beacons in both scanners is a vote for the ends of one pair matching the ends of the other,
+    so a beacon seen by both scanners gets a vote from each of the (at least threshold - 1) other
+    beacons they share.
+    """
+    pairs1 = np.triu_indices(len(first), 1)
+    pairs2 = np.triu_indices(len(second), 1)
+    _, index1, index2 = np.intersect1d(
+        distance_matrix(first)[pairs1],
+        distance_matrix(second)[pairs2],
+        return_indices=True,
+    )
+    votes = np.zeros((len(first), len(second)), dtype=int)
+    for end1 in pairs1:
+        for end2 in pairs2:
+            np.add.at(votes, (end1[index1], end2[index2]), 1)
+    return [
+        (int(beacon1), int(votes[beacon1].argmax()))
+        for beacon1 in np.flatnonzero(votes.max(1) >= threshold - 1)
+    ]
+
+
+def triangle_orientation(
+    first: np.ndarray, second: np.ndarray, matches: List[Tuple[int, int]]
+) -> Optional[Tuple[Tuple[int, int, int], Tuple[int, int, int]]]:
+    """
+    Find the (rotate, flip) orientation which lines the second scanner up with the first, from the
+    edges of triangles of matched beacons. A few triangles are tried in case a match is spurious.
+    """
+    for corner in range(min(len(matches) - 2, 4)):
+        (a1, b1), (a2, b2), (a3, b3) = matches[corner : corner + 3]
+        edges1 = np.array([first[a2] - first[a1], first[a3] - first[a1]])
+        edges2 = np.array([second[b2] - second[b1], second[b3] - second[b1]])
+        for rotate, flip in ORIENTATIONS:
+            if (edges2[:, rotate] * flip == edges1).all():
+                return rotate, flip
+    return None
+
+
+def fingerprint_overlap(
+    first: np.ndarray, second: np.ndarray, threshold: int = 12
+) -> Tuple[int, np.ndarray, np.ndarray]:
+    """
+    Alternative to best_overlap which only considers beacons whose distances to their neighbours
+    match, solves the orientation from a triangle of those, and then votes on the offset between
+    the matched beacons. Return value is the same (quantity, offset, modified) tuple, with a
+    quantity of 0 when the scanners cannot be lined up.
+    """
+    matches = matched_beacons(first, second, threshold)
+    orientation = triangle_orientation(first, second, matches)
+    if len(matches) < threshold or orientation is None:
+        return 0, np.zeros(3, dtype=int), second
+    rotate, flip = orientation
+    oriented = second[:, rotate] * flip
+    index1, index2 = np.array(matches).T
+    offsets, votes = np.unique(
+        first[index1] - oriented[index2], axis=0, return_counts=True
+    )
+    offset = offsets[votes.argmax()]
+    modified = oriented + offset
+    return common_point_count(first, modified), offset, modified
+
+
+def build_overlap_map(
+    scanners: Dict[int, np.ndarray], fingerprints: bool = True
+) -> Dict[int, Set[int]]:
     """
     Evaluate the provided set of scanners and return a mapping of each scanner number to the set of
-    scanner numbers with which it overlaps >= 12.
+    scanner numbers with which it overlaps >= 12. With fingerprints, only pairs of scanners sharing
+    the 66 distances that 12 common beacons would give them are checked, and they are lined up
+    using fingerprint_overlap.
     """
     overlap_map: Dict[int, Set[int]] = {}
+    prints = {number: fingerprint(scanner) for number, scanner in scanners.items()}
     for first, second in combinations(scanners, 2):
         if first not in overlap_map:
             overlap_map[first] = set()
         if second not in overlap_map:
             overlap_map[second] = set()
-        over, _, _ = best_overlap(scanners[first], scanners[second])
+        if fingerprints:
+            if shared_distances(prints[first], prints[second]) < 66:
+                continue
+            over, _, _ = fingerprint_overlap(scanners[first], scanners[second])
+        else:
+            over, _, _ = best_overlap(scanners[first], scanners[second])
         if over >= 12:
             overlap_map[first].add(second)
             overlap_map[second].add(first)
@@ -97,7 +208,9 @@ def hashable_point(point: np.ndarray) -> str:
 
 
 def normalise_scanners(
-    scanners: Dict[int, np.ndarray], overlap_map: Dict[int, Set[int]]
+    scanners: Dict[int, np.ndarray],
+    overlap_map: Dict[int, Set[int]],
+    fingerprints: bool = True,
 ) -> Tuple[Dict[int, np.ndarray], Set[str]]:
     """
     Create the map of scanners aligned to the coordinate map of scanner[0]. Return value is a tuple
@@ -115,7 +228,8 @@ def normalise_scanners(
                 s for s in overlap_map[existing] if s not in locations
             }
             for scanner in reachable_unmapped:
-                _, offset, new_beacons = best_overlap(
+                aligner = fingerprint_overlap if fingerprints else best_overlap
+                _, offset, new_beacons = aligner(
                     transformed[existing], scanners[scanner]
                 )
                 locations[scanner] = offset
@@ -136,6 +250,58 @@ def largest_manhattan_distance(locations: Dict[int, np.ndarray]) -> int:
     )
 
 
+def synthetic_scanners(
+    quantity: int, seed: int = 0, density: int = 30
+) -> Tuple[Dict[int, np.ndarray], Dict[int, np.ndarray]]:
+    """
+    Scatter beacons (about density of them per scanner's range) through a region, and place
+    scanners one at a time at random near an earlier one, until each overlaps its neighbour by at
+    least 12 beacons. Each scanner but the first reports its beacons relative to itself in a random
+    orientation. Return value is a tuple (scanners, locations) where locations are relative to
+    scanner 0.
+    """
+    rng = np.random.default_rng(seed)
+    side = int(2000 * np.cbrt(quantity))
+    world = rng.integers(-side, side, (density * quantity * 8, 3))
+    positions = [np.zeros(3, dtype=int)]
+    visible = [world[(np.abs(world) <= 1000).all(1)]]
+    while len(positions) < quantity:
+        parent = rng.integers(len(positions))
+        position = positions[parent] + rng.integers(-800, 800, 3)
+        beacons = world[(np.abs(world - position) <= 1000).all(1)]
+        if common_point_count(visible[parent], beacons) >= 12 and len(beacons) <= 60:
+            positions.append(position)
+            visible.append(beacons)
+
+    scanners = {}
+    for number, (position, beacons) in enumerate(zip(positions, visible)):
+        rotate, flip = ORIENTATIONS[rng.integers(len(ORIENTATIONS))]
+        if number == 0:
+            rotate, flip = (0, 1, 2), (1, 1, 1)
+        scanners[number] = rng.permutation((beacons - position)[:, rotate] * flip)
+    return scanners, dict(enumerate(positions))
+
+
+def benchmark(sizes: Iterable[int] = (10, 30, 100, 300), brute_limit: int = 10) -> None:
+    """
+    Time lining up increasing numbers of synthetic scanners, with the fingerprint pre-filter and
+    (for the smallest sizes only) by trying every orientation and offset on every pair.
+    """
+    for quantity in sizes:
+        scanners, positions = synthetic_scanners(quantity)
+        engines = (True, False) if quantity <= brute_limit else (True,)
+        for fingerprints in engines:
+            begin = perf_counter()
+            overlap_map = build_overlap_map(scanners, fingerprints)
+            locations, beacons = normalise_scanners(scanners, overlap_map, fingerprints)
+            elapsed = perf_counter() - begin
+            assert all((locations[num] == positions[num]).all() for num in positions)
+            print(
+                f"{quantity:>4} scanners, {'fingerprints' if fingerprints else 'brute force'}: "
+                f"{len(beacons)} beacons in {elapsed:.3f}s"
+            )
+
+
 def test_parts1and2() -> None:
     """
     Examples for Part 1.
@@ -317,13 +483,19 @@ def test_parts1and2() -> None:
         )
     ).all()
     assert best_overlap(scanners[0], scanners[1])[0] == 12
-    overlap_map = build_overlap_map(scanners)
-    locations, beacons = normalise_scanners(scanners, overlap_map)
-    assert (locations[0] == np.array([0, 0, 0])).all()
-    assert (locations[1] == np.array([68, -1246, -43])).all()
-    assert (locations[4] == np.array([-20, -1133, 1061])).all()
-    assert len(beacons) == 79
-    assert largest_manhattan_distance(locations) == 3621
+    assert fingerprint_overlap(scanners[0], scanners[1])[0] == 12
+    assert (
+        fingerprint_overlap(scanners[0], scanners[1])[1]
+        == best_overlap(scanners[0], scanners[1])[1]
+    ).all()
+    for fingerprints in (True, False):
+        overlap_map = build_overlap_map(scanners, fingerprints)
+        locations, beacons = normalise_scanners(scanners, overlap_map, fingerprints)
+        assert (locations[0] == np.array([0, 0, 0])).all()
+        assert (locations[1] == np.array([68, -1246, -43])).all()
+        assert (locations[4] == np.array([-20, -1133, 1061])).all()
+        assert len(beacons) == 79
+        assert largest_manhattan_distance(locations) == 3621
 
 
 def main() -> None:
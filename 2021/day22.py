@@ -7,8 +7,10 @@ from collections import deque
 from dataclasses import dataclass
 from itertools import combinations
 from math import prod
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
 import aocd  # type: ignore
+import numpy as np
 
 
 @dataclass(frozen=True, order=True)
@@ -160,6 +162,134 @@ def lit_totals(lit: Set[Cuboid]) -> Tuple[int, int]:
     return part2 - delta, part2
 
 
+def instruction_arrays(
+    instructions: Iterable[Tuple[Cuboid, bool]],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert instructions into an (n, 6) array of cuboid bounds, laid out as x0, x1, y0, y1, z0, z1,
+    and an (n,) boolean array of whether each instruction turns cubes on.
+    """
+    instructions = list(instructions)
+    bounds = np.array(
+        [
+            (c.bottom.x, c.top.x, c.bottom.y, c.top.y, c.bottom.z, c.top.z)
+            for c, _ in instructions
+        ],
+        dtype=np.int64,
+    ).reshape(-1, 6)
+    on = np.array([turn_on for _, turn_on in instructions], dtype=bool)
+    return bounds, on
+
+
+def read_instruction_arrays(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    return instruction_arrays(read_instructions(text))
+
+
+def merge_signed(
+    cuboids: np.ndarray, weights: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Combine the weights of identical cuboids, dropping any whose weights cancel out entirely.
+    """
+    if len(cuboids) == 0:
+        return cuboids, weights
+    order = np.lexsort(cuboids.T[::-1])
+    cuboids, weights = cuboids[order], weights[order]
+    starts = np.flatnonzero(
+        np.concatenate(([True], np.any(cuboids[1:] != cuboids[:-1], axis=1)))
+    )
+    merged = np.add.reduceat(weights, starts)
+    keep = merged != 0
+    return cuboids[starts][keep], merged[keep]
+
+
+def signed_total(cuboids: np.ndarray, weights: np.ndarray) -> int:
+    sizes = (cuboids[:, 1::2] - cuboids[:, 0::2] + 1).astype(object)
+    return int(np.dot(weights.astype(object), sizes.prod(axis=1)))
+
+
+def signed_volume_totals(
+    bounds: np.ndarray, on: np.ndarray, region: int = 50
+) -> Tuple[int, int]:
+    """
+    Calculate both lit totals (within the initialisation region, and overall) by inclusion-exclusion:
+    every instruction cancels out its intersection with each signed cuboid seen so far, and lit
+    cuboids are then added themselves with a positive sign.
+    """
+    cuboids = np.empty((0, 6), dtype=np.int64)
+    weights = np.empty(0, dtype=np.int64)
+    merged_size = 1
+
+    for bound, turn_on in zip(bounds, on):
+        hit = np.all(
+            (cuboids[:, 0::2] <= bound[1::2]) & (cuboids[:, 1::2] >= bound[0::2]),
+            axis=1,
+        )
+        overlaps = cuboids[hit]
+        overlaps[:, 0::2] = np.maximum(overlaps[:, 0::2], bound[0::2])
+        overlaps[:, 1::2] = np.minimum(overlaps[:, 1::2], bound[1::2])
+
+        new_cuboids = [cuboids, overlaps]
+        new_weights = [weights, -weights[hit]]
+        if turn_on:
+            new_cuboids.append(bound.reshape(1, 6))
+            new_weights.append(np.ones(1, dtype=np.int64))
+        cuboids = np.concatenate(new_cuboids)
+        weights = np.concatenate(new_weights)
+
+        # merging is a sort, so only do it once the collection has doubled in size
+        if len(cuboids) > 2 * merged_size:
+            cuboids, weights = merge_signed(cuboids, weights)
+            merged_size = max(len(cuboids), 1)
+
+    clipped = np.clip(cuboids, -region, region)
+    inside = np.all(clipped[:, 0::2] <= clipped[:, 1::2], axis=1)
+    inside &= np.all(cuboids[:, 0::2] <= region, axis=1)
+    inside &= np.all(cuboids[:, 1::2] >= -region, axis=1)
+    return (
+        signed_total(clipped[inside], weights[inside]),
+        signed_total(cuboids, weights),
+    )
+
+
+def random_instructions(
+    quantity: int, seed: int = 0, extent: int = 100_000, size: int = 30_000
+) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    lows = rng.integers(-extent, extent, size=(quantity, 3))
+    highs = lows + rng.integers(0, size, size=(quantity, 3))
+    bounds = np.empty((quantity, 6), dtype=np.int64)
+    bounds[:, 0::2] = lows
+    bounds[:, 1::2] = highs
+    return bounds, rng.random(quantity) < 0.7
+
+
+def benchmark(
+    sizes: Sequence[int] = (100, 300, 1_000, 3_000, 10_000), sliced_limit: int = 300
+) -> None:
+    """
+    Time both engines on increasing numbers of random cuboids. The slicing engine is only run up
+    to the given limit, as it quickly becomes impractically slow.
+    """
+    for quantity in sizes:
+        bounds, on = random_instructions(quantity)
+        begin = perf_counter()
+        totals = signed_volume_totals(bounds, on)
+        print(
+            f"{quantity:>6} cuboids: signed volumes {perf_counter() - begin:.3f}s",
+            end="",
+        )
+        if quantity <= sliced_limit:
+            instructions = [
+                (Cuboid(Point(*bound[0::2]), Point(*bound[1::2])), bool(turn_on))
+                for bound, turn_on in zip(bounds.tolist(), on)
+            ]
+            begin = perf_counter()
+            assert lit_totals(execute_instructions(set(), instructions)) == totals
+            print(f", slicing {perf_counter() - begin:.3f}s", end="")
+        print()
+
+
 def test_part1() -> None:
     """
     Examples for Part 1.
@@ -263,6 +393,7 @@ def test_part1() -> None:
     assert execute_instructions(one, [instructions[1]]) == two
     assert lit_totals(two) == (46, 46)
     assert lit_totals(execute_instructions(blank, instructions)) == (39, 39)
+    assert signed_volume_totals(*instruction_arrays(instructions)) == (39, 39)
 
 
 def test_part2() -> None:
@@ -335,6 +466,10 @@ def test_part2() -> None:
     )
     lit = execute_instructions(set(), read_instructions(example))
     assert lit_totals(lit) == (474140, 2758514936282235)
+    assert signed_volume_totals(*read_instruction_arrays(example)) == (
+        474140,
+        2758514936282235,
+    )
 
 
 def main() -> None:
@@ -343,8 +478,7 @@ def main() -> None:
     """
     data = aocd.get_data(year=2021, day=22)
 
-    instructions = read_instructions(data)
-    part1, part2 = lit_totals(execute_instructions(set(), instructions))
+    part1, part2 = signed_volume_totals(*read_instruction_arrays(data))
 
     print(f"Part 1: {part1}")
     print(f"Part 2: {part2}")
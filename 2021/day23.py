@@ -5,10 +5,11 @@ https://adventofcode.com/2021/day/23
 
 from dataclasses import dataclass
 from heapq import heappop, heappush
-from typing import Set, Tuple
+from time import perf_counter
+from typing import Iterator, Sequence, Set, Tuple
+import random
 import aocd  # type: ignore
 
-
 ROOMS = "ABCD"
 DOORS = (2, 4, 6, 8)
 COSTS = {"A": 1, "B": 10, "C": 100, "D": 1000}
@@ -145,6 +146,252 @@ class State:
         raise ValueError("No valid solution for this state")
 
 
+HALL = 11
+HALL_STOPS = tuple(pos for pos in range(HALL) if pos not in DOORS)
+STEP_COSTS = (0, 1, 10, 100, 1000)
+
+
+def pack(state: State) -> bytes:
+    """
+    Pack the positions of the amphipods in a state into a single bytes key: the corridor, then
+    each room from top to bottom (with empty spaces at the top), using 0 for an empty space and
+    1-4 for amphipods A-D.
+    """
+    codes = {".": 0, "A": 1, "B": 2, "C": 3, "D": 4}
+    packed = [codes[char] for char in state.corridor]
+    for contents in state.rooms:
+        packed.extend([0] * (state.room_size - len(contents)))
+        packed.extend(codes[char] for char in contents)
+    return bytes(packed)
+
+
+def heuristic(packed: bytes, room_size: int) -> int:
+    """
+    A lower bound on the energy needed to finish from the packed state: every amphipod not yet
+    settled must at least walk to the door of its own room, and the amphipods entering each room
+    must between them fill its spaces from 1 deep to however many of them there are.
+    """
+    total = 0
+    entering = [0, 0, 0, 0, 0]
+
+    for pos in range(HALL):
+        kind = packed[pos]
+        if kind:
+            total += abs(pos - DOORS[kind - 1]) * STEP_COSTS[kind]
+            entering[kind] += 1
+
+    for room in range(4):
+        base = HALL + room * room_size
+        settled = True
+        for depth in range(room_size - 1, -1, -1):
+            kind = packed[base + depth]
+            if not kind:
+                break
+            settled = settled and kind == room + 1
+            if settled:
+                continue
+            walk = abs(DOORS[room] - DOORS[kind - 1]) or 2
+            total += (depth + 1 + walk) * STEP_COSTS[kind]
+            entering[kind] += 1
+
+    for kind in range(1, 5):
+        total += entering[kind] * (entering[kind] + 1) // 2 * STEP_COSTS[kind]
+    return total
+
+
+def packed_moves(packed: bytes, room_size: int) -> Iterator[Tuple[int, bytes]]:
+    """
+    Yield the (energy, new state) moves from a packed state. If any amphipod can go straight to
+    its own room (from the corridor or directly from another room), only that move is yielded, as
+    making it at once never costs anything extra.
+    """
+    tops = []
+    ready = []
+    for room in range(4):
+        base = HALL + room * room_size
+        depth = 0
+        while depth < room_size and not packed[base + depth]:
+            depth += 1
+        tops.append(depth)
+        ready.append(all(packed[base + d] == room + 1 for d in range(depth, room_size)))
+
+    def clear(start: int, stop: int) -> bool:
+        low, high = min(start, stop), max(start, stop)
+        return not any(packed[low : high + 1])
+
+    def enter(new: bytearray, kind: int) -> int:
+        room = kind - 1
+        depth = tops[room] - 1
+        new[HALL + room * room_size + depth] = kind
+        return depth + 1
+
+    # amphipods heading home from the corridor
+    for pos in range(HALL):
+        kind = packed[pos]
+        if kind and ready[kind - 1]:
+            door = DOORS[kind - 1]
+            if clear(pos + (1 if door > pos else -1), door):
+                new = bytearray(packed)
+                new[pos] = 0
+                steps = abs(pos - door) + enter(new, kind)
+                yield steps * STEP_COSTS[kind], bytes(new)
+                return
+
+    # amphipods leaving rooms they do not belong in
+    for room in range(4):
+        if ready[room]:
+            continue
+        top = HALL + room * room_size + tops[room]
+        kind = packed[top]
+        leave = tops[room] + 1
+        door = DOORS[room]
+
+        if ready[kind - 1] and clear(door, DOORS[kind - 1]):
+            new = bytearray(packed)
+            new[top] = 0
+            steps = leave + abs(door - DOORS[kind - 1]) + enter(new, kind)
+            yield steps * STEP_COSTS[kind], bytes(new)
+            return
+
+    for room in range(4):
+        if ready[room]:
+            continue
+        top = HALL + room * room_size + tops[room]
+        kind = packed[top]
+        leave = tops[room] + 1
+        door = DOORS[room]
+        for pos in HALL_STOPS:
+            if clear(door, pos):
+                new = bytearray(packed)
+                new[top] = 0
+                new[pos] = kind
+                yield (leave + abs(door - pos)) * STEP_COSTS[kind], bytes(new)
+
+
+def solve_packed(state: State) -> Tuple[int, int]:
+    """
+    Find the least energy needed to organise the amphipods, with an A* search over packed states.
+    Return the energy along with the number of states expanded.
+    """
+    room_size = state.room_size
+    start = pack(state)
+    goal = bytes([0] * HALL + [kind for kind in range(1, 5) for _ in range(room_size)])
+
+    best = {start: 0}
+    queue = [(heuristic(start, room_size), 0, start)]
+    expanded = 0
+
+    while queue:
+        _, energy, packed = heappop(queue)
+        if best[packed] < energy:
+            continue
+        if packed == goal:
+            return state.energy + energy, expanded
+        expanded += 1
+        for cost, move in packed_moves(packed, room_size):
+            new_energy = energy + cost
+            if new_energy < best.get(move, new_energy + 1):
+                best[move] = new_energy
+                heappush(
+                    queue, (new_energy + heuristic(move, room_size), new_energy, move)
+                )
+
+    raise ValueError("No valid solution for this state")
+
+
+def scrambled_state(room_size: int, seed: int = 0, moves: int = 0) -> State:
+    """
+    Scramble a solved burrow by playing random moves backwards, so that every burrow made this way
+    can be solved (unlike a fully random shuffle, which rarely can be once the rooms are deeper
+    than 4). Backwards, the top amphipod of a room holding only its own type steps out into the
+    corridor, or an amphipod in the corridor walks into any room with space; once another type has
+    walked in, nothing can step out of that room again. To reach further down, stepping out is
+    usually preferred (filling the corridor from the ends, where it blocks the least), amphipods
+    never walk back into their own room, and they walk into the emptiest rooms first.
+
+    The mixing is still limited by the 7 places to stop in the corridor: only around the top 4 to 6
+    spaces of a room are ever scrambled, so deeper rooms mostly add amphipods already home. The
+    scramble runs for the given number of moves (4 per space in the rooms by default), then walks
+    everyone left in the corridor back in.
+    """
+    rng = random.Random(seed)
+    corridor = [0] * HALL
+    rooms = [[kind] * room_size for kind in range(1, 5)]
+
+    def clear(start: int, stop: int) -> bool:
+        low, high = min(start, stop), max(start, stop)
+        return not any(corridor[low : high + 1])
+
+    def can_walk_in(pos: int, room: int) -> bool:
+        low, high = min(pos, DOORS[room]), max(pos, DOORS[room])
+        return len(rooms[room]) < room_size and not any(
+            corridor[cell] for cell in range(low, high + 1) if cell != pos
+        )
+
+    def walk_in(pos: int, room: int) -> None:
+        rooms[room].append(corridor[pos])
+        corridor[pos] = 0
+
+    for _ in range(moves or 4 * 4 * room_size):
+        pure = [
+            room
+            for room in range(4)
+            if rooms[room]
+            and all(kind == room + 1 for kind in rooms[room])
+            and any(clear(DOORS[room], pos) for pos in HALL_STOPS)
+        ]
+        walks = [
+            (len(rooms[room]), pos, room)
+            for pos in range(HALL)
+            for room in range(4)
+            if corridor[pos] not in (0, room + 1) and can_walk_in(pos, room)
+        ]
+        if pure and (not walks or rng.random() < 0.9):
+            room = rng.choice(pure)
+            stops = [pos for pos in HALL_STOPS if clear(DOORS[room], pos)]
+            pos = max(stops, key=lambda stop: (abs(stop - DOORS[room]), rng.random()))
+            corridor[pos] = rooms[room].pop()
+        elif walks:
+            shortest = min(walks)[0]
+            _, pos, room = rng.choice([walk for walk in walks if walk[0] == shortest])
+            walk_in(pos, room)
+        else:
+            break
+
+    while any(corridor):
+        walk_in(
+            *rng.choice(
+                [
+                    (pos, room)
+                    for pos in range(HALL)
+                    for room in range(4)
+                    if corridor[pos] and can_walk_in(pos, room)
+                ]
+            )
+        )
+
+    room_a, room_b, room_c, room_d = (
+        "".join(ROOMS[kind - 1] for kind in reversed(room)) for room in rooms
+    )
+    return State(0, "." * HALL, (room_a, room_b, room_c, room_d), room_size)
+
+
+def benchmark(room_sizes: Sequence[int] = (2, 4, 6, 8), seeds: int = 3) -> None:
+    """
+    Solve scrambled burrows with rooms of increasing depth, reporting the states expanded and time.
+    Each depth gets its own seeds, as the same seed scrambles the same top spaces at every depth
+    (see scrambled_state).
+    """
+    for room_size in room_sizes:
+        for seed in range(room_size * seeds, (room_size + 1) * seeds):
+            begin = perf_counter()
+            energy, expanded = solve_packed(scrambled_state(room_size, seed))
+            print(
+                f"rooms of {room_size}, seed {seed}: energy {energy}, "
+                f"{expanded} states expanded in {perf_counter() - begin:.3f}s"
+            )
+
+
 def test_part1() -> None:
     """
     Examples for Part 1.
@@ -189,6 +436,7 @@ def test_part1() -> None:
     assert not one.is_solved()
     assert solution.is_solved()
     assert initial.solve() == solution
+    assert solve_packed(initial)[0] == 12521
 
 
 def test_part2() -> None:
@@ -212,6 +460,7 @@ def test_part2() -> None:
         == initial
     )
     assert initial.solve().energy == 44169
+    assert solve_packed(initial)[0] == 44169
 
 
 def main() -> None:
@@ -220,10 +469,10 @@ def main() -> None:
     """
     data = aocd.get_data(year=2021, day=23)
 
-    part1 = State.from_input(data)
-    print(f"Part 1: {part1.solve().energy}")
-    part2 = State.from_input(data, True)
-    print(f"Part 2: {part2.solve().energy}")
+    part1, _ = solve_packed(State.from_input(data))
+    print(f"Part 1: {part1}")
+    part2, _ = solve_packed(State.from_input(data, True))
+    print(f"Part 2: {part2}")
 
 
 if __name__ == "__main__":
@@ -4,7 +4,10 @@ https://adventofcode.com/2021/day/24
 """
 
 from collections import deque
-from typing import List, Set, Tuple
+from math import prod
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import random
 import aocd  # type: ignore
 
 # Finding the (mostly) repeated pattern in the input program:
@@ -177,6 +180,363 @@ def lowest_valid_number(reqs: Set[Tuple[int, int, int]]) -> int:
     return int("".join(str(d) for d in digits))
 
 
+# A general ALU: the program is parsed into instructions, split into blocks starting at each 'inp',
+# and each block compiled into a Python function taking the input digit and the registers the block
+# reads before writing (its 'live-in' registers), and returning the registers later blocks go on to
+# read. For MONAD every block starts 'mul x 0' / 'mul y 0' and 'inp w', so only z passes between
+# blocks, and a search for valid model numbers can remember the (block, z) states known to fail.
+
+REGISTERS = "wxyz"
+
+Instruction = Tuple[str, str, str]
+
+
+def parse_program(text: str) -> List[Instruction]:
+    """
+    Read the ALU program, one (operation, register, operand) instruction per line. The operand is
+    an empty string for 'inp'.
+    """
+    program = []
+    for line in text.strip().split("\n"):
+        operation, register, *operand = line.split()
+        program.append((operation, register, operand[0] if operand else ""))
+    return program
+
+
+def run_program(program: List[Instruction], inputs: Iterable[int]) -> Dict[str, int]:
+    """
+    Interpret the ALU program one instruction at a time, returning the final registers.
+    """
+    registers = dict.fromkeys(REGISTERS, 0)
+    feed = iter(inputs)
+    for operation, register, operand in program:
+        if operation == "inp":
+            registers[register] = next(feed)
+            continue
+        first = registers[register]
+        second = registers[operand] if operand in registers else int(operand)
+        if operation == "add":
+            registers[register] = first + second
+        elif operation == "mul":
+            registers[register] = first * second
+        elif operation == "div":
+            registers[register] = (
+                abs(first) // abs(second) * (1 if (first < 0) == (second < 0) else -1)
+            )
+        elif operation == "mod":
+            registers[register] = first % second
+        elif operation == "eql":
+            registers[register] = int(first == second)
+        else:
+            raise ValueError(f"Unknown operation: {operation}")
+    return registers
+
+
+def split_blocks(program: List[Instruction]) -> List[List[Instruction]]:
+    """
+    Split the program into blocks each starting with an 'inp' instruction.
+    """
+    blocks: List[List[Instruction]] = []
+    for instruction in program:
+        if instruction[0] == "inp" or not blocks:
+            blocks.append([])
+        blocks[-1].append(instruction)
+    return blocks
+
+
+def reads_and_writes(instruction: Instruction) -> Tuple[Set[str], str]:
+    """
+    The registers an instruction reads, and the one it writes. 'mul r 0' (and 'inp') write without
+    reading, which is what makes the usual register-clearing idioms dead stores of the old value.
+    """
+    operation, register, operand = instruction
+    if operation == "inp" or (operation == "mul" and operand == "0"):
+        return set(), register
+    return {register} | ({operand} & set(REGISTERS)), register
+
+
+def eliminate_dead_stores(
+    block: List[Instruction], live_out: Set[str]
+) -> Tuple[List[Instruction], Set[str]]:
+    """
+    Drop the instructions of a block whose results are never read, either later in the block or
+    (through live_out) by a later block. Return the remaining instructions along with the registers
+    the block reads before writing.
+    """
+    live = set(live_out)
+    kept: List[Instruction] = []
+    for instruction in reversed(block):
+        reads, writes = reads_and_writes(instruction)
+        if writes not in live:
+            continue
+        live.discard(writes)
+        live |= reads
+        kept.append(instruction)
+    return kept[::-1], live
+
+
+def block_source(
+    name: str, block: List[Instruction], live_in: List[str], live_out: List[str]
+) -> str:
+    """
+    Python source for a function running the block, taking the input digit and live-in registers.
+    Instructions which do nothing are skipped, and adding to a register just cleared to 0 becomes
+    a plain assignment.
+    """
+    lines = [f"def {name}(digit, {', '.join(live_in)}):"]
+    zeroes: Set[str] = set()
+    for operation, register, operand in block:
+        if (operation, operand) in {("add", "0"), ("mul", "1"), ("div", "1")}:
+            continue
+        if operation == "inp":
+            expression = "digit"
+        elif operation == "mul" and operand == "0":
+            expression = "0"
+        elif operation == "add" and register in zeroes:
+            expression = operand
+        elif operation == "add":
+            expression = f"{register} + {operand}"
+        elif operation == "mul":
+            expression = f"{register} * {operand}"
+        elif operation == "div":
+            expression = (
+                f"abs({register}) // abs({operand}) "
+                f"* (1 if ({register} < 0) == ({operand} < 0) else -1)"
+            )
+        elif operation == "mod":
+            expression = f"{register} % {operand}"
+        elif operation == "eql":
+            expression = f"int({register} == {operand})"
+        else:
+            raise ValueError(f"Unknown operation: {operation}")
+        lines.append(f"    {register} = {expression}")
+        if expression == "0":
+            zeroes.add(register)
+        else:
+            zeroes.discard(register)
+    lines.append(f"    return ({''.join(reg + ', ' for reg in live_out)})")
+    return "\n".join(lines)
+
+
+CompiledBlock = Tuple[Callable[..., Tuple[int, ...]], Tuple[str, ...]]
+
+
+def compile_program(program: List[Instruction]) -> List[CompiledBlock]:
+    """
+    Compile each block of the program to a Python function, after dead-store elimination. Only z
+    is live after the final block, since that is all a model number's validity depends on. Each
+    block comes with the names of its live-in registers (registers never written before the first
+    block start at 0), and each function returns the live-in registers of the next.
+    """
+    blocks = split_blocks(program)
+    live_after = set("z")
+    optimised: List[Tuple[List[Instruction], Set[str]]] = []
+    for block in reversed(blocks):
+        kept, live_in = eliminate_dead_stores(block, live_after)
+        optimised.append((kept, live_in))
+        live_after = live_in
+    optimised.reverse()
+
+    compiled: List[CompiledBlock] = []
+    for number, (block, live_in) in enumerate(optimised):
+        live_out = (
+            sorted(optimised[number + 1][1]) if number + 1 < len(optimised) else ["z"]
+        )
+        names = sorted(live_in - {"digit"})
+        namespace: Dict[str, Callable[..., Tuple[int, ...]]] = {}
+        # The source is generated from the parsed program above, never taken from outside
+        exec(  # pylint: disable=exec-used
+            block_source(f"block_{number}", block, names, live_out), namespace
+        )
+        compiled.append((namespace[f"block_{number}"], tuple(names)))
+    return compiled
+
+
+MONAD_BLOCK = (
+    ("inp", "w", ""),
+    ("mul", "x", "0"),
+    ("add", "x", "z"),
+    ("mod", "x", "26"),
+    ("div", "z", None),
+    ("add", "x", None),
+    ("eql", "x", "w"),
+    ("eql", "x", "0"),
+    ("mul", "y", "0"),
+    ("add", "y", "25"),
+    ("mul", "y", "x"),
+    ("add", "y", "1"),
+    ("mul", "z", "y"),
+    ("mul", "y", "0"),
+    ("add", "y", "w"),
+    ("add", "y", None),
+    ("mul", "y", "x"),
+    ("add", "z", "y"),
+)
+
+
+def monad_shaped(program: List[Instruction]) -> bool:
+    """
+    Whether every block of the program follows the MONAD pattern above, with any constants in
+    place of the line-5 divisor, VAR1 and VAR2 (marked None in MONAD_BLOCK).
+    """
+    blocks = split_blocks(program)
+    return bool(blocks) and all(
+        len(block) == len(MONAD_BLOCK)
+        and all(
+            instruction[:2] == expected[:2]
+            and (
+                instruction[2] == expected[2]
+                if expected[2] is not None
+                else instruction[2] not in REGISTERS
+            )
+            for instruction, expected in zip(block, MONAD_BLOCK)
+        )
+        for block in blocks
+    )
+
+
+def valid_model_number(
+    program: List[Instruction], highest: bool = True, bounded: Optional[bool] = None
+) -> int:
+    """
+    Find the highest (or lowest) model number for which the program leaves z at 0, by a depth-first
+    search over the compiled blocks trying digits from 9 down (or 1 up). States (block number and
+    live-in registers, which for MONAD is only z) from which no digits lead to success are
+    remembered and never searched again.
+
+    When bounded, z is assumed only to shrink through 'div z N' instructions (as in MONAD), so a
+    state is abandoned once z is at least the product of the divisors in the remaining blocks. That
+    does not hold for programs in general, so by default the bound is only used if the program is
+    monad_shaped.
+    """
+    if bounded is None:
+        bounded = monad_shaped(program)
+    compiled = compile_program(program)
+    digits = range(9, 0, -1) if highest else range(1, 10)
+    dead: Set[Tuple[int, Tuple[int, ...]]] = set()
+
+    limits = [1]
+    for block in reversed(split_blocks(program)):
+        divisor = prod(
+            int(operand)
+            for operation, register, operand in block
+            if operation == "div" and register == "z" and operand not in REGISTERS
+        )
+        limits.append(limits[-1] * abs(divisor))
+    limits.reverse()
+
+    def search(number: int, state: Tuple[int, ...]) -> Optional[str]:
+        if number == len(compiled):
+            return "" if state[-1] == 0 else None
+        if (number, state) in dead:
+            return None
+        if bounded and "z" in compiled[number][1] and state[-1] >= limits[number]:
+            return None
+        block, _ = compiled[number]
+        for digit in digits:
+            rest = search(number + 1, block(digit, *state))
+            if rest is not None:
+                return str(digit) + rest
+        dead.add((number, state))
+        return None
+
+    initial = tuple(0 for _ in compiled[0][1])
+    result = search(0, initial)
+    if result is None:
+        raise ValueError("No valid model number")
+    return int(result)
+
+
+def monad_program(seed: int = 0) -> str:
+    """
+    Generate a 14-block MONAD-style program following the pattern above: seven blocks pushing
+    (INP + VAR2) on to z, and seven popping a value off and comparing it to INP - VAR1, nested at
+    random with constraints that some digits can satisfy.
+    """
+    rng = random.Random(seed)
+    pushes = [True] * 7 + [False] * 7
+    while True:
+        rng.shuffle(pushes)
+        depths = [sum(1 if push else -1 for push in pushes[: n + 1]) for n in range(14)]
+        if min(depths) >= 0:
+            break
+
+    stack: List[int] = []
+    var2s = [rng.randint(1, 16) for _ in range(14)]
+    lines: List[str] = []
+    for number, push in enumerate(pushes):
+        if push:
+            stack.append(number)
+            divisor, var1 = 1, rng.randint(10, 16)
+        else:
+            divisor, var1 = 26, rng.randint(-8, 8) - var2s[stack.pop()]
+        lines.extend(
+            (
+                "inp w",
+                "mul x 0",
+                "add x z",
+                "mod x 26",
+                f"div z {divisor}",
+                f"add x {var1}",
+                "eql x w",
+                "eql x 0",
+                "mul y 0",
+                "add y 25",
+                "mul y x",
+                "add y 1",
+                "mul z y",
+                "mul y 0",
+                "add y w",
+                f"add y {var2s[number]}",
+                "mul y x",
+                "add z y",
+            )
+        )
+    return "\n".join(lines)
+
+
+def benchmark(seed: int = 0, numbers: int = 20_000) -> None:
+    """
+    Report how many blocks per second the interpreter and the compiled blocks run, on random model
+    numbers for a generated program, then time the searches and check them against the answers
+    from the hard-coded pattern.
+    """
+    text = monad_program(seed)
+    program = parse_program(text)
+    compiled = compile_program(program)
+    rng = random.Random(seed)
+    model_numbers = [[rng.randint(1, 9) for _ in range(14)] for _ in range(numbers)]
+
+    begin = perf_counter()
+    for model_number in model_numbers:
+        run_program(program, model_number)
+    interpreted = perf_counter() - begin
+
+    begin = perf_counter()
+    for model_number in model_numbers:
+        state: Tuple[int, ...] = (0,)
+        for (block, _), digit in zip(compiled, model_number):
+            state = block(digit, *state)
+    compiled_time = perf_counter() - begin
+
+    blocks = 14 * numbers
+    print(f"interpreter: {blocks / interpreted:,.0f} blocks/s")
+    print(f"compiled:    {blocks / compiled_time:,.0f} blocks/s")
+
+    reqs = match_requirements(text)
+    for highest, expected in (
+        (True, highest_valid_number(reqs)),
+        (False, lowest_valid_number(reqs)),
+    ):
+        begin = perf_counter()
+        found = valid_model_number(program, highest)
+        assert found == expected
+        print(
+            f"{'highest' if highest else 'lowest'} valid model number {found} "
+            f"in {perf_counter() - begin:.3f}s"
+        )
+
+
 def test_part1() -> None:
     """
     Testing the functions for part 1.
@@ -218,6 +578,61 @@ def test_part2() -> None:
     assert lowest_valid_number(reqs) == 15_161_111_111_111
 
 
+def test_alu() -> None:
+    """
+    Examples of ALU programs, and the compiled blocks and searches checked against the interpreter
+    and the hard-coded pattern on a generated program.
+    """
+    negate = parse_program("inp x\nmul x -1")
+    assert negate == [("inp", "x", ""), ("mul", "x", "-1")]
+    assert run_program(negate, [7])["x"] == -7
+    binary = parse_program(
+        "\n".join(
+            (
+                "inp w",
+                "add z w",
+                "mod z 2",
+                "div w 2",
+                "add y w",
+                "mod y 2",
+                "div w 2",
+                "add x w",
+                "mod x 2",
+                "div w 2",
+                "mod w 2",
+            )
+        )
+    )
+    assert run_program(binary, [13]) == {"w": 1, "x": 1, "y": 0, "z": 1}
+    assert run_program(parse_program("inp w\ndiv w 2"), [-7])["w"] == -3
+
+    adder = parse_program("inp w\nadd z w\ninp w\nadd z w\nadd z -10")
+    assert not monad_shaped(adder)
+    assert valid_model_number(adder) == 91
+    assert valid_model_number(adder, highest=False) == 19
+
+    text = monad_program(1)
+    program = parse_program(text)
+    compiled = compile_program(program)
+    assert len(compiled) == 14
+    assert all(names == ("z",) for _, names in compiled)
+    rng = random.Random(1)
+    for _ in range(50):
+        model_number = [rng.randint(1, 9) for _ in range(14)]
+        state: Tuple[int, ...] = (0,)
+        for (block, _), digit in zip(compiled, model_number):
+            state = block(digit, *state)
+        assert state == (run_program(program, model_number)["z"],)
+
+    assert monad_shaped(program)
+    reqs = match_requirements(text)
+    highest = valid_model_number(program)
+    lowest = valid_model_number(program, highest=False)
+    assert highest == highest_valid_number(reqs)
+    assert lowest == lowest_valid_number(reqs)
+    assert run_program(program, [int(digit) for digit in str(highest)])["z"] == 0
+
+
 def main() -> None:
     """
     Calculate and output the solutions based on the real puzzle input.
@@ -7,8 +7,10 @@ from collections import deque
 from dataclasses import dataclass
 from enum import Enum
 from math import prod
+from typing import Optional
 import re
 import aocd  # type: ignore
+import numpy as np
 
 RE_MONKEY_ID = re.compile(r"Monkey (\d+)")
 RE_STARTING_ITEMS = re.compile(r"  Starting items: ([\d, ]+)")
@@ -145,6 +147,111 @@ def monkey_business(monkeys: dict[int, Monkey], part_two: bool = False) -> int:
     return ordered_counts[0] * ordered_counts[1]
 
 
+def item_rounds(
+    monkeys: dict[int, Monkey], positions: np.ndarray, worries: np.ndarray
+) -> np.ndarray:
+    """
+    Play a round of the Part 2 rules (worry kept modulo the product of the tests) for a batch of
+    items at once, updating each item's monkey and worry in place. Items don't interact, and an
+    item thrown to a later monkey is inspected again in the same round, so every item held by each
+    monkey in turn can be inspected together. Return the inspections for each item by each monkey.
+    """
+    modulus = prod(monkey.test for monkey in monkeys.values())
+    inspections = np.zeros((len(positions), len(monkeys)), dtype=np.int64)
+
+    for monkey_id, monkey in monkeys.items():
+        held = np.flatnonzero(positions == monkey_id)
+        if not held.size:
+            continue
+        worry = worries[held]
+        if monkey.operation == Operation.MUL:
+            worry = worry * monkey.operand
+        elif monkey.operation == Operation.ADD:
+            worry = worry + monkey.operand
+        else:
+            worry = worry * worry
+        worry %= modulus
+        inspections[held, monkey_id] += 1
+        positions[held] = np.where(
+            worry % monkey.test == 0, monkey.target_true, monkey.target_false
+        )
+        worries[held] = worry
+
+    return inspections
+
+
+def extrapolated_inspections(
+    monkeys: dict[int, Monkey], rounds: int = 10_000
+) -> list[int]:
+    """
+    Count the inspections made by each monkey over any number of rounds under the Part 2 rules.
+
+    Each item is followed on its own as a (monkey, worry modulo the product of the tests) state at
+    the start of each round, all items being played together in item_rounds. That state decides
+    everything that happens to the item afterwards, so once it repeats the item is in a cycle, and
+    its inspections for the remaining rounds are extrapolated from those made during one cycle.
+    """
+    positions = np.array(
+        [
+            monkey_id
+            for monkey_id, monkey in monkeys.items()
+            for _ in monkey.starting_items
+        ]
+    )
+    worries = np.array(
+        [item for monkey in monkeys.values() for item in monkey.starting_items],
+        dtype=np.int64,
+    )
+    modulus = prod(monkey.test for monkey in monkeys.values())
+    worries %= modulus
+
+    items = len(positions)
+    history = [np.zeros((items, len(monkeys)), dtype=np.int64)]
+    seen: list[dict[int, int]] = [{} for _ in range(items)]
+    cycles: list[Optional[tuple[int, int]]] = [None] * items
+    remaining = items
+
+    while remaining and len(history) <= rounds:
+        keys = (positions * modulus + worries).tolist()
+        for item, key in enumerate(keys):
+            if cycles[item] is None:
+                if key in seen[item]:
+                    cycles[item] = (seen[item][key], len(history) - 1)
+                    remaining -= 1
+                else:
+                    seen[item][key] = len(history) - 1
+        history.append(history[-1] + item_rounds(monkeys, positions, worries))
+
+    totals = [0] * len(monkeys)
+    for item, cycle in enumerate(cycles):
+        if cycle is None or rounds < len(history):
+            counts = history[rounds][item].tolist()
+        else:
+            start, repeat = cycle
+            laps, rest = divmod(rounds - start, repeat - start)
+            counts = [
+                int(base) + laps * (int(lap) - int(base)) + int(extra) - int(base)
+                for base, lap, extra in zip(
+                    history[start][item],
+                    history[repeat][item],
+                    history[start + rest][item],
+                )
+            ]
+        totals = [total + count for total, count in zip(totals, counts)]
+
+    return totals
+
+
+def extrapolated_monkey_business(
+    monkeys: dict[int, Monkey], rounds: int = 10_000
+) -> int:
+    """
+    The Part 2 product of the two largest inspection-counts, extrapolated to any number of rounds.
+    """
+    ordered_counts = sorted(extrapolated_inspections(monkeys, rounds), reverse=True)
+    return ordered_counts[0] * ordered_counts[1]
+
+
 def test_part1() -> None:
     """
     Examples for Part 1.
@@ -220,6 +327,9 @@ def test_part2() -> None:
         3: Monkey(3, (74,), Operation.ADD, 3, 17, 0, 1),
     }
     assert monkey_business(monkeys, True) == 2_713_310_158
+    assert extrapolated_inspections(monkeys) == [52166, 47830, 1938, 52013]
+    assert extrapolated_monkey_business(monkeys) == 2_713_310_158
+    assert extrapolated_inspections(monkeys, 20) == [99, 97, 8, 103]
 
 
 def main() -> None:
@@ -230,7 +340,7 @@ def main() -> None:
     monkeys = Monkey.all_from_description(data)
 
     print(f"Part 1: {monkey_business(monkeys)}")
-    print(f"Part 2: {monkey_business(monkeys, True)}")
+    print(f"Part 2: {extrapolated_monkey_business(monkeys)}")
 
 
 if __name__ == "__main__":
@@ -6,8 +6,10 @@ https://adventofcode.com/2022/day/14
 from functools import reduce
 from itertools import pairwise, takewhile
 from operator import or_
+from time import perf_counter
 from typing import Iterator
 import aocd  # type: ignore
+import numpy as np
 
 
 def read_point(point_str: str) -> complex:
@@ -86,27 +88,101 @@ def drop_sand(rocks: set[complex], resting_sand: set[complex]) -> complex:
     return sand
 
 
-def sandfill(rocks: set[complex]) -> Iterator[complex]:
+def occupancy_grid(rocks: set[complex]) -> tuple[np.ndarray, int]:
+    """
+    Draw the rock structure into a 2D boolean grid indexed [y, x - offset], including the
+    infinite-length floor as its last row. The grid is wide enough for sand heaped up from the
+    floor to the source, which spreads at most one x coordinate per y. Return the grid along with
+    the offset of its x coordinates.
+    """
+    floor_y = int(max(pt.real for pt in rocks)) + 2
+    low_x = min(500 - floor_y - 1, int(min(pt.imag for pt in rocks)))
+    high_x = max(500 + floor_y + 1, int(max(pt.imag for pt in rocks)))
+
+    grid = np.zeros((floor_y + 1, high_x - low_x + 1), dtype=bool)
+    ys = np.array([pt.real for pt in rocks], dtype=int)
+    xs = np.array([pt.imag for pt in rocks], dtype=int)
+    grid[ys, xs - low_x] = True
+    grid[floor_y] = True
+    return grid, low_x
+
+
+def sandfill(rocks: set[complex], grid: bool = True) -> Iterator[complex]:
     """
     Fill the given rock structure with sand until all new sand is flowing off into infinite space,
     yielding each space at which sand comes to rest.
+
+    With the grid engine, the locations are held in an occupancy grid and the path of the falling
+    sand is kept as a stack: once a unit comes to rest, the next one carries on falling from the
+    last space on the path before it, as everything above that is unchanged.
     """
+    if not grid:
+        yield from sandfill_by_sets(rocks)
+        return
+
+    occupied, offset = occupancy_grid(rocks)
+    path = [(0, 500 - offset)]
+    while path:
+        y, x = path[-1]
+        below = occupied[y + 1]
+        if not below[x]:
+            path.append((y + 1, x))
+        elif not below[x - 1]:
+            path.append((y + 1, x - 1))
+        elif not below[x + 1]:
+            path.append((y + 1, x + 1))
+        else:
+            occupied[y, x] = True
+            path.pop()
+            yield complex(y, x + offset)
+
+
+def sandfill_by_sets(rocks: set[complex]) -> Iterator[complex]:
     resting_sand: set[complex] = set()
     while complex(0, 500) not in resting_sand:
         yield (sand := drop_sand(rocks, resting_sand))
         resting_sand.add(sand)
 
 
-def sand_needed_to_fill(rocks: set[complex]) -> tuple[int, int]:
+def floor_fill_count(rocks: set[complex]) -> int:
+    """
+    Count the sand needed to fill the rock structure with the infinite-length floor present,
+    without dropping any: the sand ends up covering every space reachable from the source by
+    moving down, down-left or down-right, so the grid is flooded one row at a time.
+    """
+    occupied, offset = occupancy_grid(rocks)
+    reached = np.zeros(occupied.shape[1], dtype=bool)
+    reached[500 - offset] = True
+    total = 1
+    for row in occupied[1:-1]:
+        spread = reached.copy()
+        spread[1:] |= reached[:-1]
+        spread[:-1] |= reached[1:]
+        reached = spread & ~row
+        total += int(reached.sum())
+    return total
+
+
+def sand_needed_to_fill(rocks: set[complex], grid: bool = True) -> tuple[int, int]:
     """
     Return the amount of sand needed to fill the given rock structures with and without an
     infinite-length floor present two y values below the structure.
+
+    With the grid engine, sand is only dropped until it first reaches the floor, and the total with
+    the floor is counted by floor_fill_count.
     """
+    if grid:
+        floor_y = max(pt.real for pt in rocks) + 1
+        no_floor = sum(
+            1 for _ in takewhile(lambda pt: pt.real < floor_y, sandfill(rocks))
+        )
+        return no_floor, floor_fill_count(rocks)
+
     no_floor = with_floor = 0
     hit_infinite = False
     floor_y = max(pt.real for pt in rocks) + 1
 
-    for sand in sandfill(rocks):
+    for sand in sandfill(rocks, grid=False):
         if not (hit_infinite := (hit_infinite or sand.real == floor_y)):
             no_floor += 1
         with_floor += 1
@@ -114,6 +190,45 @@ def sand_needed_to_fill(rocks: set[complex]) -> tuple[int, int]:
     return no_floor, with_floor
 
 
+def random_rocks(scale: int = 1, seed: int = 0) -> set[complex]:
+    """
+    Generate a rock structure like the puzzle input's (about 150 paths reaching down to y=170)
+    covering scale times the area, with scale times as many paths.
+    """
+    rng = np.random.default_rng(seed)
+    depth = int(170 * scale**0.5)
+    lines = []
+    for _ in range(150 * scale):
+        x, y = 500 + int(rng.integers(-depth // 2, depth // 2)), int(
+            rng.integers(10, depth)
+        )
+        points = [f"{x},{y}"]
+        for turn in range(int(rng.integers(1, 6))):
+            if turn % 2:
+                y = min(max(y + int(rng.integers(-8, 9)), 10), depth)
+            else:
+                x += int(rng.integers(-8, 9))
+            points.append(f"{x},{y}")
+        lines.append(" -> ".join(points))
+    return read_rocks("\n".join(lines))
+
+
+def benchmark(scales: tuple[int, ...] = (1, 10, 100), sets_limit: int = 1) -> None:
+    """
+    Time filling random rock structures of increasing size with each engine. The set-based engine
+    is only run up to the given scale.
+    """
+    for scale in scales:
+        rocks = random_rocks(scale)
+        for grid in (True, False) if scale <= sets_limit else (True,):
+            begin = perf_counter()
+            no_floor, with_floor = sand_needed_to_fill(rocks, grid)
+            print(
+                f"scale {scale:>3}, {'grid' if grid else 'sets'}: {no_floor} and {with_floor} "
+                f"units of sand in {perf_counter() - begin:.3f}s"
+            )
+
+
 def test_part1() -> None:
     """
     Examples for Part 1.
@@ -183,7 +298,7 @@ def test_part1() -> None:
     assert drop_sand(rocks, set()) == complex(8, 500)
     assert drop_sand(rocks, {complex(8, 500)}) == complex(8, 499)
     assert drop_sand(rocks, {complex(8, 500), complex(8, 499)}) == complex(8, 501)
-    assert tuple(takewhile(lambda pt: pt.real < 10, sandfill(rocks))) == (
+    assert tuple(takewhile(lambda pt: pt.real < 10, sandfill(rocks, grid=False))) == (
         complex(8, 500),
         complex(8, 499),
         complex(8, 501),
@@ -266,102 +381,108 @@ def test_part2() -> None:
     assert drop_sand(rocks, sand) == complex(10, 493)
     assert drop_sand(rocks, sand | {complex(10, 493)}) == complex(10, 492)
 
-    assert tuple(sandfill(rocks)) == (
-        complex(8, 500),
-        complex(8, 499),
-        complex(8, 501),
-        complex(7, 500),
-        complex(8, 498),
-        complex(7, 499),
-        complex(7, 501),
-        complex(6, 500),
-        complex(8, 497),
-        complex(7, 498),
-        complex(6, 499),
-        complex(6, 501),
-        complex(5, 500),
-        complex(5, 499),
-        complex(5, 501),
-        complex(4, 500),
-        complex(4, 499),
-        complex(4, 501),
-        complex(3, 500),
-        complex(3, 499),
-        complex(3, 501),
-        complex(2, 500),
-        complex(5, 497),
-        complex(8, 495),
-        complex(10, 493),
-        complex(10, 492),
-        complex(10, 494),
-        complex(9, 493),
-        complex(8, 494),
-        complex(8, 496),
-        complex(7, 495),
-        complex(10, 491),
-        complex(9, 492),
-        complex(8, 493),
-        complex(7, 494),
-        complex(7, 496),
-        complex(6, 495),
-        complex(5, 496),
-        complex(4, 497),
-        complex(3, 498),
-        complex(2, 499),
-        complex(3, 502),
-        complex(2, 501),
-        complex(1, 500),
-        complex(10, 490),
-        complex(9, 491),
-        complex(8, 492),
-        complex(7, 493),
-        complex(6, 494),
-        complex(5, 495),
-        complex(4, 496),
-        complex(3, 497),
-        complex(2, 498),
-        complex(1, 499),
-        complex(10, 504),
-        complex(10, 503),
-        complex(10, 505),
-        complex(9, 504),
-        complex(10, 502),
-        complex(9, 503),
-        complex(10, 506),
-        complex(9, 505),
-        complex(8, 504),
-        complex(8, 503),
-        complex(10, 507),
-        complex(9, 506),
-        complex(8, 505),
-        complex(7, 504),
-        complex(7, 503),
-        complex(10, 508),
-        complex(9, 507),
-        complex(8, 506),
-        complex(7, 505),
-        complex(6, 504),
-        complex(6, 503),
-        complex(10, 509),
-        complex(9, 508),
-        complex(8, 507),
-        complex(7, 506),
-        complex(6, 505),
-        complex(5, 504),
-        complex(5, 503),
-        complex(10, 510),
-        complex(9, 509),
-        complex(8, 508),
-        complex(7, 507),
-        complex(6, 506),
-        complex(5, 505),
-        complex(4, 504),
-        complex(3, 503),
-        complex(2, 502),
-        complex(1, 501),
-        complex(0, 500),
+    assert (
+        tuple(sandfill(rocks))
+        == tuple(sandfill(rocks, grid=False))
+        == (
+            complex(8, 500),
+            complex(8, 499),
+            complex(8, 501),
+            complex(7, 500),
+            complex(8, 498),
+            complex(7, 499),
+            complex(7, 501),
+            complex(6, 500),
+            complex(8, 497),
+            complex(7, 498),
+            complex(6, 499),
+            complex(6, 501),
+            complex(5, 500),
+            complex(5, 499),
+            complex(5, 501),
+            complex(4, 500),
+            complex(4, 499),
+            complex(4, 501),
+            complex(3, 500),
+            complex(3, 499),
+            complex(3, 501),
+            complex(2, 500),
+            complex(5, 497),
+            complex(8, 495),
+            complex(10, 493),
+            complex(10, 492),
+            complex(10, 494),
+            complex(9, 493),
+            complex(8, 494),
+            complex(8, 496),
+            complex(7, 495),
+            complex(10, 491),
+            complex(9, 492),
+            complex(8, 493),
+            complex(7, 494),
+            complex(7, 496),
+            complex(6, 495),
+            complex(5, 496),
+            complex(4, 497),
+            complex(3, 498),
+            complex(2, 499),
+            complex(3, 502),
+            complex(2, 501),
+            complex(1, 500),
+            complex(10, 490),
+            complex(9, 491),
+            complex(8, 492),
+            complex(7, 493),
+            complex(6, 494),
+            complex(5, 495),
+            complex(4, 496),
+            complex(3, 497),
+            complex(2, 498),
+            complex(1, 499),
+            complex(10, 504),
+            complex(10, 503),
+            complex(10, 505),
+            complex(9, 504),
+            complex(10, 502),
+            complex(9, 503),
+            complex(10, 506),
+            complex(9, 505),
+            complex(8, 504),
+            complex(8, 503),
+            complex(10, 507),
+            complex(9, 506),
+            complex(8, 505),
+            complex(7, 504),
+            complex(7, 503),
+            complex(10, 508),
+            complex(9, 507),
+            complex(8, 506),
+            complex(7, 505),
+            complex(6, 504),
+            complex(6, 503),
+            complex(10, 509),
+            complex(9, 508),
+            complex(8, 507),
+            complex(7, 506),
+            complex(6, 505),
+            complex(5, 504),
+            complex(5, 503),
+            complex(10, 510),
+            complex(9, 509),
+            complex(8, 508),
+            complex(7, 507),
+            complex(6, 506),
+            complex(5, 505),
+            complex(4, 504),
+            complex(3, 503),
+            complex(2, 502),
+            complex(1, 501),
+            complex(0, 500),
+        )
     )
     assert sand_needed_to_fill(rocks) == (24, 93)
+    assert sand_needed_to_fill(rocks, grid=False) == (24, 93)
+    assert floor_fill_count(rocks) == 93
 
 
 def main() -> None:
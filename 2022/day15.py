@@ -7,6 +7,7 @@ from dataclasses import dataclass
 from typing import Sequence
 import re
 import aocd  # type: ignore
+import numpy as np
 
 
 @dataclass(frozen=True, order=True)
@@ -112,13 +113,22 @@ def count_non_beacon_locations_in_row(sensors: Sequence[Sensor], row: int) -> in
 
 
 def find_potential_beacon_location(
-    sensors: Sequence[Sensor], min_coord: int = 0, max_coord: int = 4_000_000
+    sensors: Sequence[Sensor],
+    min_coord: int = 0,
+    max_coord: int = 4_000_000,
+    geometric: bool = True,
 ) -> Point:
     """
     Given the provided set of sensors, scan for a gap where the beacon could be located, within the
     square with a top-left corner at (min_coord, min_coord) and a bottom-right corner at
     (max_coord, max_coord).
+
+    By default, only the candidate points where sensor boundaries cross are checked (see
+    boundary_candidates); otherwise every row is scanned in turn.
     """
+    if geometric:
+        return find_beacon_at_boundaries(sensors, min_coord, max_coord)
+
     for y_coord in range(max_coord, min_coord - 1, -1):
         x_ranges = sorted(
             (sensor.covered_range_for_row(y_coord) for sensor in sensors),
@@ -146,6 +156,84 @@ def find_potential_beacon_location(
     raise ValueError("No valid beacon location found")
 
 
+def boundary_candidates(
+    sensors: Sequence[Sensor], min_coord: int, max_coord: int
+) -> np.ndarray:
+    """
+    Return an array of (y, x) candidate points for a lone gap in the sensors' coverage.
+
+    Such a gap must lie just outside the coverage of the sensors around it, i.e. on the diamond
+    edges at distance + 1 from them (or on the edge of the search square). Rotating coordinates to
+    u = x + y and v = x - y turns every diamond edge into a line of constant u or v, so the
+    candidates are the crossings of those lines with each other and with the search square.
+    """
+    sensor_x = np.array([sensor.sensor.x_coord for sensor in sensors], dtype=np.int64)
+    sensor_y = np.array([sensor.sensor.y_coord for sensor in sensors], dtype=np.int64)
+    reach = np.array([sensor.beacon_distance for sensor in sensors], dtype=np.int64) + 1
+
+    u_lines = np.unique(
+        np.concatenate((sensor_x + sensor_y - reach, sensor_x + sensor_y + reach))
+    )
+    v_lines = np.unique(
+        np.concatenate((sensor_x - sensor_y - reach, sensor_x - sensor_y + reach))
+    )
+
+    u_grid, v_grid = np.meshgrid(u_lines, v_lines)
+    u_vals, v_vals = u_grid.ravel(), v_grid.ravel()
+    # where u + v is odd the lines cross between lattice points, so take the points around it
+    crossings = np.concatenate(
+        [
+            np.column_stack(((u_vals - v_vals + dy) // 2, (u_vals + v_vals + dx) // 2))
+            for dy, dx in ((0, 0), (-1, -1), (-1, 1), (1, -1), (1, 1))
+        ]
+    )
+
+    edges = np.array([min_coord, max_coord], dtype=np.int64)
+    u_edges = np.tile(edges, len(u_lines))
+    v_edges = np.tile(edges, len(v_lines))
+    u_offsets = np.subtract.outer(u_lines, edges).ravel()
+    v_offsets = np.add.outer(v_lines, edges).ravel()
+    v_mirrored = (edges - v_lines[:, None]).ravel()
+    on_square = (
+        np.array([(y, x) for y in edges for x in edges], dtype=np.int64),
+        np.column_stack((u_offsets, u_edges)),
+        np.column_stack((u_edges, u_offsets)),
+        np.column_stack((v_mirrored, v_edges)),
+        np.column_stack((v_edges, v_offsets)),
+    )
+    return np.concatenate((crossings, *on_square))
+
+
+def find_beacon_at_boundaries(
+    sensors: Sequence[Sensor], min_coord: int = 0, max_coord: int = 4_000_000
+) -> Point:
+    """
+    Find the gap where the beacon could be located by checking only the points where sensor
+    boundaries cross, each against every sensor at once. If there are several gaps, the one which
+    scanning the rows from the bottom up would find first is returned.
+    """
+    candidates = boundary_candidates(sensors, min_coord, max_coord)
+    inside = np.all((candidates >= min_coord) & (candidates <= max_coord), axis=1)
+    candidates = candidates[inside]
+
+    sensor_y = np.array([sensor.sensor.y_coord for sensor in sensors], dtype=np.int64)
+    sensor_x = np.array([sensor.sensor.x_coord for sensor in sensors], dtype=np.int64)
+    distance = np.array([sensor.beacon_distance for sensor in sensors], dtype=np.int64)
+
+    uncovered = np.all(
+        np.abs(candidates[:, 0:1] - sensor_y) + np.abs(candidates[:, 1:2] - sensor_x)
+        > distance,
+        axis=1,
+    )
+    if not uncovered.any():
+        raise ValueError("No valid beacon location found")
+
+    found = candidates[uncovered]
+    y_coord = found[:, 0].max()
+    x_coord = found[found[:, 0] == y_coord, 1].min()
+    return Point(int(y_coord), int(x_coord))
+
+
 def tuning_frequency(
     sensors: Sequence[Sensor], min_coord: int = 0, max_coord: int = 4_000_000
 ) -> int:
@@ -228,6 +316,7 @@ def test_part2() -> None:
         Sensor(Point(1, 20), Point(3, 15)),
     )
     assert find_potential_beacon_location(sensors, 0, 20) == Point(11, 14)
+    assert find_potential_beacon_location(sensors, 0, 20, False) == Point(11, 14)
     assert tuning_frequency(sensors, 0, 20) == 56_000_011
 
 
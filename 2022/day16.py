@@ -5,11 +5,10 @@ https://adventofcode.com/2022/day/16
 
 from collections import deque
 from dataclasses import dataclass
-from functools import cached_property, reduce
-from itertools import combinations
-from operator import and_ as intersection
+from functools import cached_property, lru_cache
 import re
 import aocd  # type: ignore
+import numpy as np
 
 re_valve = re.compile(
     r"Valve (\w+) has flow rate=(\d+); tunnels? leads? to valves? ([\w, ]+)"
@@ -41,18 +40,6 @@ class Valve:
         )
 
 
-@dataclass(frozen=True)
-class State:
-    """
-    A possible state whilst exploring a system of valves.
-    """
-
-    time: int
-    location: str
-    open_valves: frozenset[str]
-    pressure: int
-
-
 @dataclass
 class ValveSystem:
     """
@@ -98,55 +85,150 @@ class ValveSystem:
 
         return graph
 
-    def best_pressure_possibilities(self, time: int) -> dict[frozenset[str], int]:
+    @cached_property
+    def worthy_valves(self) -> list[str]:
         """
-        Explore possible moves within the system and return a mapping of possible sets of turned-on
-        valves to the maximum pressure that can be generated by that set.
+        Return the names of the valves worth opening (i.e. those with a positive flow rate), in the
+        order of the bits which represent them in a set of open valves.
         """
-        results: dict[frozenset[str], int] = {}
-        worthy_valves = set(
-            valve.name for valve in self.valves.values() if valve.flow_rate > 0
+        return sorted(
+            name for name, valve in self.valves.items() if valve.flow_rate > 0
         )
 
-        consider = deque([State(time, "AA", frozenset(), 0)])
+    @cached_property
+    def distance_matrix(self) -> list[list[int]]:
+        """
+        Return the shortest distances between the worthy valves, as a dense matrix indexed by their
+        bit indices. An extra final row and column hold the distances from and to the start, AA.
+        """
+        nodes = self.worthy_valves + ["AA"]
+        unreachable = sum(len(distances) for distances in self.graph.values()) + 1
+        return [
+            [
+                0 if origin == dest else self.graph[origin].get(dest, unreachable)
+                for dest in nodes
+            ]
+            for origin in nodes
+        ]
+
+    def best_pressure_by_mask(self, time: int) -> list[int]:
+        """
+        Explore possible moves within the system and return, for each bitmask of turned-on worthy
+        valves, the maximum pressure that can be generated by that set (or -1 if the set cannot be
+        turned on in time). Each (location, time, mask) state is only explored further when it is
+        reached with more pressure than before.
+        """
+        flows = [self.valves[name].flow_rate for name in self.worthy_valves]
+        distances = self.distance_matrix
+        count = len(flows)
+
+        results = [-1] * (1 << count)
+        seen: dict[tuple[int, int, int], int] = {}
+        consider = [(count, time, 0, 0)]
         while consider:
-            state = consider.popleft()
-
-            current_best = results.get(state.open_valves, -1)
-            if state.pressure > current_best:
-                results[state.open_valves] = state.pressure
-
-            for neighbour, distance in self.graph[state.location].items():
-                if (neighbour not in state.open_valves) and (
-                    neighbour in worthy_valves
-                ):
-                    new_time = state.time - distance - 1
-                    if new_time >= 0:
-                        extra_pressure = self.valves[neighbour].flow_rate * new_time
-                        consider.append(
-                            State(
-                                new_time,
-                                neighbour,
-                                state.open_valves | {neighbour},
-                                state.pressure + extra_pressure,
-                            )
-                        )
+            location, time_left, mask, pressure = consider.pop()
+            results[mask] = max(results[mask], pressure)
+
+            for valve, flow_rate in enumerate(flows):
+                bit = 1 << valve
+                new_time = time_left - distances[location][valve] - 1
+                if mask & bit or new_time <= 0:
+                    continue
+                new_pressure = pressure + flow_rate * new_time
+                state = (valve, new_time, mask | bit)
+                if seen.get(state, -1) < new_pressure:
+                    seen[state] = new_pressure
+                    consider.append((valve, new_time, mask | bit, new_pressure))
 
         return results
 
+    def best_pressure_possibilities(self, time: int) -> dict[frozenset[str], int]:
+        """
+        Explore possible moves within the system and return a mapping of possible sets of turned-on
+        valves to the maximum pressure that can be generated by that set.
+        """
+        return {
+            frozenset(
+                name for bit, name in enumerate(self.worthy_valves) if mask & (1 << bit)
+            ): pressure
+            for mask, pressure in enumerate(self.best_pressure_by_mask(time))
+            if pressure >= 0
+        }
+
     def most_pressure_possible(self, time: int, actors: int) -> int:
         """
         Return the maximum amount of pressure that can be generated in this valve system in the
         given amount of time by the given number of actors.
+
+        The actors open disjoint sets of valves, so they are added one at a time with
+        add_actor, and the last takes the best set from the valves the others left closed.
         """
-        possible = self.best_pressure_possibilities(time)
+        best = self.best_pressure_by_mask(time)
         if actors == 1:
-            return max(possible.values())
-        return max(
-            sum(possible[valve_set] for valve_set in combo)
-            for combo in combinations(possible, actors)
-            if len(reduce(intersection, combo)) == 0
-        )
+            return max(best)
+        team = np.array(subset_maxima(best))
+        for _ in range(actors - 2):
+            team = add_actor(team, np.array(best))
+        alone = subset_maxima(best)
+        full = len(best) - 1
+        return max(int(team[mask]) + alone[full ^ mask] for mask in range(len(best)))
+
+    def most_pressure_by_search(self, time: int, actors: int) -> int:
+        """
+        Return the maximum amount of pressure that can be generated by the given number of actors,
+        through a memoised depth-first search keyed on (location, time, mask, actors). When one
+        actor stops, the next begins from the start with the valves already opened.
+        """
+        flows = [self.valves[name].flow_rate for name in self.worthy_valves]
+        distances = self.distance_matrix
+        start = len(flows)
+
+        @lru_cache(maxsize=None)
+        def best(location: int, time_left: int, mask: int, actors_left: int) -> int:
+            result = best(start, time, mask, actors_left - 1) if actors_left > 1 else 0
+            for valve, flow_rate in enumerate(flows):
+                bit = 1 << valve
+                new_time = time_left - distances[location][valve] - 1
+                if not mask & bit and new_time > 0:
+                    result = max(
+                        result,
+                        flow_rate * new_time
+                        + best(valve, new_time, mask | bit, actors_left),
+                    )
+            return result
+
+        return best(start, time, 0, actors)
+
+
+def add_actor(team: np.ndarray, best: np.ndarray) -> np.ndarray:
+    """
+    Add an actor to a team, given the most pressure the team can generate from any subset of each
+    bitmask and the most one actor can generate from exactly each bitmask (-1 if unreachable).
+    This is a max-plus subset convolution: the result for each mask is the greatest of
+    best[s] + team[mask ^ s] over the reachable subsets s of the mask, which is itself the most
+    from any subset. Each reachable set is combined with every set disjoint from it at once.
+    """
+    masks = np.arange(len(team))
+    result = team.copy()
+    for mask in np.flatnonzero(best > 0):
+        free = masks[(masks & mask) == 0]
+        result[free | mask] = np.maximum(result[free | mask], best[mask] + team[free])
+    return result
+
+
+def subset_maxima(values: list[int]) -> list[int]:
+    """
+    For a list indexed by bitmask, return the list of the maximum value over all subsets of each
+    mask, in O(2^n * n).
+    """
+    result = list(values)
+    bit = 1
+    while bit < len(result):
+        for mask in range(len(result)):
+            if mask & bit and result[mask ^ bit] > result[mask]:
+                result[mask] = result[mask ^ bit]
+        bit <<= 1
+    return result
 
 
 def test_part1() -> None:
@@ -230,6 +312,12 @@ def test_part2() -> None:
     assert possible[frozenset(("DD", "HH", "EE"))] == 943
     assert possible[frozenset(("JJ", "BB", "CC"))] == 764
     assert system.most_pressure_possible(26, 2) == 1707
+    assert system.most_pressure_by_search(26, 2) == 1707
+    assert system.most_pressure_by_search(30, 1) == 1651
+    for actors in (1, 3, 4):
+        assert system.most_pressure_possible(
+            20, actors
+        ) == system.most_pressure_by_search(20, actors)
 
 
 def main() -> None:
@@ -4,10 +4,12 @@ https://adventofcode.com/2023/day/24
 """
 
 from dataclasses import dataclass
-from typing import Iterable
+from fractions import Fraction
+from itertools import combinations
+from typing import Iterable, Optional, Sequence
 import re
 import aocd  # type: ignore
-import z3  # type: ignore
+import numpy as np
 
 Point = tuple[int, int, int]
 
@@ -38,17 +40,126 @@ def read_hailstone(line: str) -> Hailstone:
     return Hailstone((posx, posy, posz), (velx, vely, velz))
 
 
-def read_hailstones(data: str) -> Iterable[Hailstone]:
+def read_hailstones(data: str) -> list[Hailstone]:
     """
     Read the hailstones.
     """
     return [read_hailstone(line) for line in data.split("\n")]
 
 
-def launch_point_for_moonshot(hailstones: Iterable[Hailstone]) -> int:
+def intersections_in_test_area(
+    hailstones: Iterable[Hailstone],
+    low: int = 200_000_000_000_000,
+    high: int = 400_000_000_000_000,
+) -> int:
     """
-    Calculate the point from which a stonecould be thrown hitting every hailstone.
+    Count the pairs of hailstones whose paths cross (ignoring z) in the future of both, at a point
+    within the test area, solving for every pair at once.
     """
+    stones = list(hailstones)
+    position = np.array([stone.position[:2] for stone in stones], dtype=float)
+    velocity = np.array([stone.velocity[:2] for stone in stones], dtype=float)
+
+    def cross(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        return np.asarray(
+            first[..., 0] * second[..., 1] - first[..., 1] * second[..., 0]
+        )
+
+    # position[i] + t * velocity[i] == position[j] + s * velocity[j]
+    gap = position[None, :] - position[:, None]
+    det = cross(velocity[:, None], velocity[None, :])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        time_first = cross(gap, velocity[None, :]) / det
+        time_second = cross(gap, velocity[:, None]) / det
+    crossing = position[:, None] + time_first[..., None] * velocity[:, None]
+
+    within = (
+        (det != 0)
+        & (time_first > 0)
+        & (time_second > 0)
+        & ((crossing >= low) & (crossing <= high)).all(-1)
+    )
+    return int(np.triu(within, 1).sum())
+
+
+def cross_product(first: Point, second: Point) -> Point:
+    return (
+        first[1] * second[2] - first[2] * second[1],
+        first[2] * second[0] - first[0] * second[2],
+        first[0] * second[1] - first[1] * second[0],
+    )
+
+
+def solve_exactly(
+    matrix: list[list[Fraction]], rhs: list[Fraction]
+) -> Optional[list[Fraction]]:
+    """
+    Solve the square linear system by Gaussian elimination over fractions, returning None if it is
+    singular.
+    """
+    size = len(matrix)
+    rows = [row[:] + [value] for row, value in zip(matrix, rhs)]
+    for col in range(size):
+        pivot = next((row for row in range(col, size) if rows[row][col] != 0), None)
+        if pivot is None:
+            return None
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for row in range(size):
+            if row != col and rows[row][col] != 0:
+                factor = rows[row][col] / rows[col][col]
+                rows[row] = [
+                    val - factor * top for val, top in zip(rows[row], rows[col])
+                ]
+    return [rows[row][size] / rows[row][row] for row in range(size)]
+
+
+def linear_launch_point(hailstones: Sequence[Hailstone]) -> Optional[tuple[int, ...]]:
+    """
+    Find the position and velocity (px, py, pz, vx, vy, vz) of a stone hitting every hailstone,
+    without a solver.
+
+    The stone hits hailstone i when (P - p_i) x (V - v_i) == 0. The only nonlinear term, P x V, is
+    the same for every hailstone, so subtracting the equation for hailstone i from hailstone j
+    leaves P x (v_j - v_i) + (p_j - p_i) x V == p_j x v_j - p_i x v_i, three linear equations.
+    Two such pairs give a 6x6 system. Triples of hailstones are tried until one gives a system with
+    an integer solution; None is returned if none do.
+    """
+    for first, second, third in combinations(hailstones, 3):
+        matrix: list[list[Fraction]] = []
+        rhs: list[Fraction] = []
+        for other in (second, third):
+            (ax, ay, az), (bx, by, bz) = (
+                tuple(o - f for o, f in zip(other.velocity, first.velocity)),
+                tuple(o - f for o, f in zip(other.position, first.position)),
+            )
+            matrix.extend(
+                [Fraction(val) for val in row]
+                for row in (
+                    (0, az, -ay, 0, -bz, by),
+                    (-az, 0, ax, bz, 0, -bx),
+                    (ay, -ax, 0, -by, bx, 0),
+                )
+            )
+            rhs.extend(
+                Fraction(val1 - val2)
+                for val1, val2 in zip(
+                    cross_product(other.position, other.velocity),
+                    cross_product(first.position, first.velocity),
+                )
+            )
+        solution = solve_exactly(matrix, rhs)
+        if solution is not None and all(val.denominator == 1 for val in solution):
+            return tuple(int(val) for val in solution)
+    return None
+
+
+def launch_point_by_solver(hailstones: Iterable[Hailstone]) -> int:
+    """
+    Calculate the point from which a stone could be thrown hitting every hailstone, with z3 (only
+    imported when this is called).
+    """
+    import z3  # type: ignore  # pylint: disable=import-outside-toplevel
+
     solver = z3.Solver()
     pos = z3.RealVector("p", 3)
     vel = z3.RealVector("v", 3)
@@ -67,6 +178,41 @@ def launch_point_for_moonshot(hailstones: Iterable[Hailstone]) -> int:
     return int(solver.model().eval(sum(pos)).as_long())
 
 
+def launch_point_for_moonshot(
+    hailstones: Iterable[Hailstone], exact: bool = True
+) -> int:
+    """
+    Calculate the point from which a stone could be thrown hitting every hailstone, returning the
+    sum of its coordinates. The exact linear solution is used unless it fails (or exact is False),
+    in which case z3 is used.
+    """
+    stones = list(hailstones)
+    if exact and (launch := linear_launch_point(stones)) is not None:
+        return sum(launch[:3])
+    return launch_point_by_solver(stones)
+
+
+def test_parts1and2() -> None:
+    """
+    Examples for Parts 1 and 2.
+    """
+    hailstones = read_hailstones(
+        "\n".join(
+            (
+                "19, 13, 30 @ -2,  1, -2",
+                "18, 19, 22 @ -1, -1, -2",
+                "20, 25, 34 @ -2, -2, -4",
+                "12, 31, 28 @ -1, -2, -1",
+                "20, 19, 15 @  1, -5, -3",
+            )
+        )
+    )
+    assert hailstones[0] == Hailstone((19, 13, 30), (-2, 1, -2))
+    assert intersections_in_test_area(hailstones, 7, 27) == 2
+    assert linear_launch_point(hailstones) == (24, 13, 10, -3, 1, 2)
+    assert launch_point_for_moonshot(hailstones) == 47
+
+
 def main() -> None:
     """
     Calculate and output solutions based on the real puzzle input.
@@ -74,8 +220,8 @@ def main() -> None:
     data = aocd.get_data(year=2023, day=24)
     hailstones = read_hailstones(data)
 
-    launch = launch_point_for_moonshot(hailstones)
-    print(f"Part 1: {launch}")
+    print(f"Part 1: {intersections_in_test_area(hailstones)}")
+    print(f"Part 2: {launch_point_for_moonshot(hailstones)}")
 
 
 if __name__ == "__main__":
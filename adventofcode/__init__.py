@@ -0,0 +1,3 @@
+"""
+Helpers shared by more than one puzzle script.
+"""
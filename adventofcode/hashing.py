@@ -0,0 +1,76 @@
+"""
+Parallel md5 prefix search, shared by the puzzles which look for hashes of a key followed by an
+increasing index (2015 day 4 and 2016 days 5 and 14).
+"""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from hashlib import md5
+from itertools import count
+from os import cpu_count
+from typing import Any, Callable, Deque, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+CHUNK_SIZE = 50_000
+
+
+def search_chunk(key: str, prefix: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """
+    Hash every index in the range [start, stop) appended to the key, returning the
+    (index, hexdigest) pairs whose hexdigest begins with the given prefix. The key is fed into an
+    md5 object only once, and that object is copied for each index.
+    """
+    keyed = md5(key.encode())
+    hits = []
+    for index in range(start, stop):
+        hsh = keyed.copy()
+        hsh.update(str(index).encode())
+        hexdigest = hsh.hexdigest()
+        if hexdigest.startswith(prefix):
+            hits.append((index, hexdigest))
+    return hits
+
+
+def ordered_chunks(
+    function: Callable[..., List[T]],
+    args: Tuple[Any, ...],
+    start: int = 0,
+    processes: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[T]:
+    """
+    Ordered stream of the results of function(*args, chunk_start, chunk_stop) over consecutive
+    fixed-size chunks counting up from start. The chunks are fanned out over a process pool with a
+    bounded number in flight, and their results are yielded back in chunk order.
+    """
+    workers = processes or cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque["Future[List[T]]"] = deque()
+        starts = count(start=start, step=chunk_size)
+        try:
+            while True:
+                while len(pending) < 2 * workers:
+                    chunk_start = next(starts)
+                    pending.append(
+                        pool.submit(
+                            function, *args, chunk_start, chunk_start + chunk_size
+                        )
+                    )
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def prefix_search(
+    key: str,
+    prefix: str,
+    start: int = 0,
+    processes: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Ordered stream of (index, hexdigest) pairs for every index (counting up from start) whose md5
+    hash, appended to the key, begins with the given prefix.
+    """
+    return ordered_chunks(search_chunk, (key, prefix), start, processes, chunk_size)